@@ -1,30 +1,175 @@
 import os
+import asyncio
 from datetime import datetime
-from pydantic import BaseModel, Field
-from openai import OpenAI
-import requests
+from functools import lru_cache
+from pydantic import BaseModel, Field, ValidationError
 import logging
 import json
-from collections import defaultdict
-from datetime import datetime
-
-# Set up logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+from cache import CompletionCache, TTLCache, stream_chat_completion
+from review_store import get_review_store
+from review_digest import format_digest, get_digest_store
+from pre_ranking import explain_ranking, pre_rank
+from fast_path import fast_path_parser
+from geocoding import geocoder
+from resilience import UpstreamUnavailable, last_good_hotels, request_with_retries
+import tracing
+
+# Logging is configured by whoever runs the assistant, see __main__
 logger = logging.getLogger(__name__)
 
-# Set up ollama client
-client = OpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    api_key=os.environ.get("GROQ_API_KEY")
-)
+# Upstream services, overridable to point at local stand-ins
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+HOTELS_API_URL = os.environ.get("HOTELS_API_URL", "http://localhost:8084")
+
+# Groq client, built on first use since importing openai dominates the module's import time
+client = None
+
+
+def get_client():
+    global client
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(base_url=GROQ_BASE_URL, api_key=os.environ.get("GROQ_API_KEY"))
+    return client
+
+
+# Pooled client for the weather and hotels APIs. Connections belong to the event loop
+# that opened them, so a new client is made when it is called from another loop. Runs
+# that end their loop close it first (close_http_client); the hotels API passes its own
+# shared client instead (use_http_client)
+http_client = None
+http_client_loop = None
+http_client_owned = False
+
+
+def get_http_client():
+    global http_client, http_client_loop, http_client_owned
+    loop = asyncio.get_running_loop()
+    if http_client is None or http_client_loop is not loop:
+        import httpx
+        if http_client is not None and http_client_owned and http_client_loop.is_running():
+            # Only the loop that opened the connections can close them
+            asyncio.run_coroutine_threadsafe(http_client.aclose(), http_client_loop)
+        http_client = httpx.AsyncClient()
+        http_client_loop = loop
+        http_client_owned = True
+    return http_client
+
+
+async def close_http_client():
+    """Close the client opened on the running loop, if any. Call it before the loop ends."""
+    global http_client, http_client_loop, http_client_owned
+    client, owned = http_client, http_client_owned
+    if client is None or http_client_loop is not asyncio.get_running_loop():
+        return
+    http_client, http_client_loop, http_client_owned = None, None, False
+    if owned:
+        await client.aclose()
+
+
+async def use_http_client(client):
+    """Send weather and hotels requests of the running loop through `client`, which its owner closes."""
+    global http_client, http_client_loop, http_client_owned
+    if client is http_client:
+        return
+    await close_http_client()
+    http_client, http_client_loop, http_client_owned = client, asyncio.get_running_loop(), False
+
+
+async def closing_http_client(awaitable):
+    """Await `awaitable`, then close the HTTP client, for runs that own their event loop."""
+    try:
+        return await awaitable
+    finally:
+        await close_http_client()
 
 # LLM model name
 model = "llama-3.3-70b-versatile"
 
+# Check the request and extract the stay details in one LLM call instead of two
+SINGLE_CALL_EXTRACTION = os.environ.get("ASSISTANT_SINGLE_CALL", "true").lower() == "true"
+
+# Parse simple prompts with rules before asking the LLM
+FAST_PATH_EXTRACTION = os.environ.get("ASSISTANT_FAST_PATH", "true").lower() == "true"
+
+# Rank hotels from precomputed review digests instead of the full review text
+REVIEW_DIGESTS = os.environ.get("ASSISTANT_REVIEW_DIGESTS", "true").lower() == "true"
+
+# Number of reviews per hotel retrieved for the user's query. 0 sends every review (or only digests)
+REVIEW_TOP_K = int(os.environ.get("ASSISTANT_REVIEW_TOP_K", "3"))
+
+# Hotels kept after deterministic pre-ranking and sent to the ranking LLM
+PRE_RANK_SHORTLIST = int(os.environ.get("ASSISTANT_PRE_RANK_SHORTLIST", "6"))
+
+# "llm" asks the model for the final ranking, "algorithmic" builds it from the pre-ranking scores
+RANKING_MODE = os.environ.get("ASSISTANT_RANKING_MODE", "llm")
+
+# Forecasts keyed on rounded coordinates and dates. Open-Meteo models update hourly
+weather_cache = TTLCache(
+    max_entries=int(os.environ.get("WEATHER_CACHE_SIZE", "512")),
+    ttl=int(os.environ.get("WEATHER_CACHE_TTL", "3600"))
+)
+
+# Completions are cached on disk by content. Per call site TTLs in seconds
+COMPLETION_CACHE_ENABLED = os.environ.get("COMPLETION_CACHE", "true").lower() == "true"
+completion_cache = CompletionCache(
+    os.environ.get("COMPLETION_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "completion_cache.sqlite3")),
+    max_entries=int(os.environ.get("COMPLETION_CACHE_SIZE", "10000")),
+    ttls={
+        "check_request": 7 * 24 * 3600,
+        "extract_stay_details": 24 * 3600,
+        "check_and_extract_stay_details": 24 * 3600,
+        "weather_tool_call": 24 * 3600,
+        "weather_summary": 6 * 3600,
+        "hotel_ranking": 24 * 3600,
+    }
+) if COMPLETION_CACHE_ENABLED else None
+
+
+# Pipeline stage each LLM call site is traced as
+CALL_SITE_STAGES = {
+    "check_request": "gate",
+    "extract_stay_details": "extraction",
+    "check_and_extract_stay_details": "extraction",
+    "weather_tool_call": "weather_tool_call",
+    "weather_summary": "weather_summary",
+    "hotel_ranking": "ranking",
+}
+
+
+async def create_completion(call_site:str, on_delta=None, parse=None, **request):
+    """
+    Chat completion through the cache. Pass `on_delta` to stream the content as it is generated.
+    With `parse` the result of parse(completion) is returned instead; a completion it rejects
+    by raising is never cached.
+    """
+    with tracing.span(CALL_SITE_STAGES.get(call_site, call_site), call_site=call_site) as span:
+        if completion_cache is not None:
+            completion = await completion_cache.create(get_client(), call_site, on_delta=on_delta, validate=parse, **request)
+        elif on_delta is not None:
+            completion = await stream_chat_completion(get_client(), on_delta, **request)
+        else:
+            completion = await get_client().chat.completions.create(**request)
+        if not span.attributes.get("cache_hits"):
+            tracing.record_usage(completion.usage)
+        return completion if parse is None else parse(completion)
+
+
+def parse_content(model_class):
+    """`parse` for create_completion: the JSON content validated against a response model."""
+    return lambda completion: model_class.model_validate_json(completion.choices[0].message.content)
+
+
+def parse_tool_calls(completion):
+    """`parse` for create_completion: the completion, once it asks for tools with JSON arguments."""
+    tool_calls = completion.choices[0].message.tool_calls
+    if not tool_calls:
+        raise ValueError("Completion did not call a tool")
+    for tool_call in tool_calls:
+        json.loads(tool_call.function.arguments)
+    return completion
+
 # Tools
 tools = [
   {
@@ -91,6 +236,21 @@ class EventDetails(BaseModel):
     )
 
 
+class AccomodationSearch(BaseModel):
+    """Single LLM call: Check the request and parse stay details together"""
+
+    is_accomodation_search: bool = Field(
+        description="Is the text a query related to finding an accomodation?"
+    )
+    city: str = Field(description="City in which the accomodation should be booked")
+    start_date: str = Field(
+        description="Date and time of checking into the accomodation. Strictly use 'yyyy-mm-dd' date format for this value. Example is 2025-03-25"
+    )
+    end_date: str = Field(
+        description="Date and time of checking out of the accomodation. Strictly use 'yyyy-mm-dd' date format for this value. Example is 2025-03-25"
+    )
+
+
 # Define the Pydantic model for hotel ranking
 class HotelRanking(BaseModel):
     hotel_name: str = Field(description=f"Name of the hotel exactly as in the input")
@@ -104,72 +264,93 @@ class HotelRankingsResponse(BaseModel):
     rank_2: HotelRanking = Field(description="The name, reason for being assigned second rank, pros and cons of the second ranked hotel")
     rank_3: HotelRanking = Field(description="The name, reason for being assigned third rank, pros and cons of the third ranked hotel")
 
+
+@lru_cache(maxsize=None)
+def schema_json(model_class):
+    """JSON schema of a response model as embedded in the system prompts, built once per model."""
+    return json.dumps(model_class.model_json_schema(), indent=2)
+
+
 # ---------------------------------------------------------------
 # Functions
 # ---------------------------------------------------------------\
 
-def call_function(name, args):
+async def call_function(name, args):
     if name == "get_weather_forecast":
-        return get_weather_forecast(**args)
+        return await get_weather_forecast(**args)
+
+
+@tracing.traced("forecast_http")
+async def get_weather_forecast(latitude, longitude, start_date, end_date):
+    # ~1 km precision is plenty for a city forecast and lets nearby lookups share entries
+    cache_key = (round(float(latitude), 2), round(float(longitude), 2), start_date, end_date)
+    result = weather_cache.get(cache_key)
+    if result is not None:
+        tracing.add("cache_hits")
+        return result
+
+    try:
+        response = await request_with_retries(
+            get_http_client(), "GET",
+            f"{OPEN_METEO_URL}?latitude={latitude}&longitude={longitude}&hourly=temperature_2m,relative_humidity_2m,rain&start_date={start_date}&end_date={end_date}"
+        )
+        data = response.json()
+    except (UpstreamUnavailable, ValueError) as e:
+        logger.error(f"Weather forecast unavailable: {e}")
+        return {"error": "Weather forecast unavailable."}
 
+    result = aggregate_daily_weather(data.get('hourly', {}))
+    if "error" not in result:
+        weather_cache.set(cache_key, result)
+    return result
 
-def get_weather_forecast(latitude, longitude, start_date, end_date):
-    response = requests.get(
-        f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&hourly=temperature_2m,relative_humidity_2m,rain&start_date={start_date}&end_date={end_date}"
-    )
-    data = response.json()
-    
-    time = data['hourly'].get('time', [])
-    temperature = data['hourly'].get('temperature_2m', [])
-    humidity = data['hourly'].get('relative_humidity_2m', [])
-    rain = data['hourly'].get('rain', [])
+
+def aggregate_daily_weather(hourly):
+    time = hourly.get('time', [])
+    temperature = hourly.get('temperature_2m', [])
+    humidity = hourly.get('relative_humidity_2m', [])
+    rain = hourly.get('rain', [])
 
     if not (time and temperature and humidity and rain):
         return {"error": "Incomplete weather data."}
 
-    daily_data = defaultdict(lambda: {'temperature': [], 'humidity': [], 'total_rain': 0, 'rain_times': []})
+    import numpy as np
+
+    # Group the hourly series by its 'YYYY-MM-DD' prefix and reduce each group with bincount
+    times = np.asarray(time, dtype='U16')
+    days, day_index = np.unique(times.astype('U10'), return_inverse=True)
+    counts = np.bincount(day_index)
+    rain_values = np.asarray(rain, dtype=float)
 
-    for i in range(len(time)):
-        date = datetime.fromisoformat(time[i]).date()
-        daily_data[date]['temperature'].append(temperature[i])
-        daily_data[date]['humidity'].append(humidity[i])
-        daily_data[date]['total_rain'] += rain[i]
+    avg_temp = np.bincount(day_index, weights=np.asarray(temperature, dtype=float)) / counts
+    avg_humidity = np.bincount(day_index, weights=np.asarray(humidity, dtype=float)) / counts
+    total_rain = np.bincount(day_index, weights=rain_values)
 
-        if rain[i] > 0:
-            daily_data[date]['rain_times'].append({"time": time[i].split('T')[1], "rain": rain[i]})
+    rain_times = [[] for _ in days]
+    for i in np.flatnonzero(rain_values > 0):
+        rain_times[day_index[i]].append({"time": time[i].split('T')[1], "rain": rain[i]})
 
     result = {}
-    for date, values in daily_data.items():
-        avg_temp = sum(values['temperature']) / len(values['temperature'])
-        avg_humidity = sum(values['humidity']) / len(values['humidity'])
+    for i, date in enumerate(days):
         result[str(date)] = {
-            "average_temperature": round(avg_temp, 1),
-            "average_humidity": round(avg_humidity, 1),
-            "total_rain": round(values['total_rain'], 1),
-            "rain_times": values['rain_times']
+            "average_temperature": round(float(avg_temp[i]), 1),
+            "average_humidity": round(float(avg_humidity[i]), 1),
+            "total_rain": round(float(total_rain[i]), 1),
+            "rain_times": rain_times[i]
         }
 
     return result
 
 
 def get_reviews_by_city_and_hotel(json_file, city_name, hotel_name):
-    # Load JSON data
-    with open(json_file, encoding='utf-8') as file:
-        data = json.load(file)
-
-    # Iterate through cities
-    for city in data.get("cities", []):
-        if city["city"].lower() == city_name.lower():
-            # Iterate through hotels
-            for hotel in city.get("hotels", []):
-                if hotel["hotel_name"].lower() == hotel_name.lower():
-                    return hotel.get("reviews", [])
-
-    return []
+    # Knowledge base is parsed once per file and reloaded only when it changes
+    return get_review_store(json_file).get_reviews(city_name, hotel_name)
 
 
-def check_accomodation_request(input_prompt: str):
-    completion = client.chat.completions.create(
+async def check_accomodation_request(input_prompt: str):
+    return await create_completion(
+        call_site="check_request",
+        parse=parse_content(check_prompt),
         model=model,
         messages=[
             {
@@ -181,7 +362,7 @@ def check_accomodation_request(input_prompt: str):
                     In this context, Analyze if the text describes a query for finding accomodation.
                     Say yes if the text describes a query for finding accomodation, else say no.
                     Output should be in json format:
-                    {json.dumps(check_prompt.model_json_schema(), indent=2)}
+                    {schema_json(check_prompt)}
                     """ 
             },
             {"role": "user", "content": input_prompt},
@@ -189,27 +370,58 @@ def check_accomodation_request(input_prompt: str):
         response_format={"type": "json_object"}
     )
 
-    return check_prompt.model_validate_json(completion.choices[0].message.content)
 
+async def extract_stay_details(input:str):
+    today = datetime.now()
+    date_context = f"Today is {today.strftime('%A, %B %d, %Y')}."
 
-def extract_stay_details(input:str):
+    return await create_completion(
+        call_site="extract_stay_details",
+        parse=parse_content(EventDetails),
+        model=model,
+        messages=[
+            {
+                "role": "system",
+                "content": f"""
+                    You are an assistant for finding accomodation.
+                    Extract the name of the city in which the user wishes to stay. If city is not found, strictly use the placeholder [None].
+                    {date_context} When dates reference 'next Tuesday' or similar relative dates, use this current date as reference.
+                    Extract the check-in date. Check-in date is date on which the user will start staying in the accomodation. Strictly use 'yyyy-mm-dd' date format. If check-in date is not found, strictly use the placeholder [None].
+                    Extract the check-out date. Check-out date is date on which the user will leave the accomodation.  Strictly use 'yyyy-mm-dd' date format. If check-out date is not found, strictly use the placeholder [None].
+                    Do not make any assumptions for the city, check-in date and check-out date.
+                    Output should be in json format:
+                    {schema_json(EventDetails)}
+                """
+            },
+            {"role": "user", "content": input},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.3
+    )
+
+
+async def check_and_extract_stay_details(input:str):
     today = datetime.now()
     date_context = f"Today is {today.strftime('%A, %B %d, %Y')}."
 
-    completion = client.chat.completions.create(
+    return await create_completion(
+        call_site="check_and_extract_stay_details",
+        parse=parse_content(AccomodationSearch),
         model=model,
         messages=[
             {
                 "role": "system",
                 "content": f"""
                     You are an assistant for finding accomodation.
+                    You are allowed to answer only to queries related to accomodation search.
+                    Analyze if the text describes a query for finding accomodation and set is_accomodation_search accordingly.
                     Extract the name of the city in which the user wishes to stay. If city is not found, strictly use the placeholder [None].
                     {date_context} When dates reference 'next Tuesday' or similar relative dates, use this current date as reference.
                     Extract the check-in date. Check-in date is date on which the user will start staying in the accomodation. Strictly use 'yyyy-mm-dd' date format. If check-in date is not found, strictly use the placeholder [None].
                     Extract the check-out date. Check-out date is date on which the user will leave the accomodation.  Strictly use 'yyyy-mm-dd' date format. If check-out date is not found, strictly use the placeholder [None].
                     Do not make any assumptions for the city, check-in date and check-out date.
                     Output should be in json format:
-                    {json.dumps(EventDetails.model_json_schema(), indent=2)}
+                    {schema_json(AccomodationSearch)}
                 """
             },
             {"role": "user", "content": input},
@@ -218,10 +430,37 @@ def extract_stay_details(input:str):
         temperature=0.3
     )
 
-    return EventDetails.model_validate_json(completion.choices[0].message.content)
 
+async def get_stay_details(input:str, single_call:bool = SINGLE_CALL_EXTRACTION):
+    """Return the EventDetails of an accomodation search, or None for any other request."""
+    if FAST_PATH_EXTRACTION:
+        with tracing.span("extraction", call_site="fast_path") as span:
+            details = fast_path_parser.parse(input)
+            span.set("hit", details is not None)
+        if details is not None:
+            return EventDetails(**details)
+
+    if single_call:
+        try:
+            search = await check_and_extract_stay_details(input)
+            if not search.is_accomodation_search:
+                return None
+            return EventDetails(city=search.city, start_date=search.start_date, end_date=search.end_date)
+        except ValidationError as e:
+            logger.warning(f"Combined extraction failed validation, falling back to two calls: {e}")
+
+    logger.info("Checking if prompt is accomodation search request...")
+    is_accomodation_request = await check_accomodation_request(input)
 
-def get_weather_forecast_summary(place_of_stay:str, check_in_date:str, check_out_date:str):
+    if not is_accomodation_request.is_accomodation_search:
+        return None
+
+    logger.info("Extracting details of stay...")
+    return await extract_stay_details(input)
+
+
+async def get_weather_forecast_summary(place_of_stay:str, check_in_date:str, check_out_date:str,
+                                       on_weather_data=None, on_delta=None):
     # system_prompt = "You are a helpful weather assistant. \
     #             You can determine the latitude and longitude based on the name of the city/place \
     #             You strictly use 'yyyy-mm-dd' format for dates. \
@@ -278,12 +517,31 @@ def get_weather_forecast_summary(place_of_stay:str, check_in_date:str, check_out
 
     """
 
+    coordinates = geocoder.resolve(place_of_stay)
+    if coordinates is not None:
+        # Known place: fetch the forecast directly and only ask the LLM for the summary
+        result = await get_weather_forecast(coordinates[0], coordinates[1], check_in_date, check_out_date)
+        if on_weather_data is not None:
+            on_weather_data(result)
+        weather_summary = await create_completion(
+            call_site="weather_summary",
+            on_delta=on_delta,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Weather forecast for {place_of_stay} between {check_in_date} and {check_out_date}:\n{json.dumps(result)}"},
+            ]
+        )
+        return weather_summary, result
+
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": f"What is the weather forecast for {place_of_stay} between {check_in_date} and {check_out_date}?"},
     ]
 
-    completion = client.chat.completions.create(
+    completion = await create_completion(
+        call_site="weather_tool_call",
+        parse=parse_tool_calls,
         model=model,
         messages=messages,
         tools=tools,
@@ -294,12 +552,18 @@ def get_weather_forecast_summary(place_of_stay:str, check_in_date:str, check_out
         args = json.loads(tool_call.function.arguments)
         messages.append(completion.choices[0].message)
 
-        result = call_function(name, args)
+        result = await call_function(name, args)
         messages.append(
             {"role": "tool", "tool_call_id": tool_call.id, "content": json.dumps(result)}
         )
-
-    weather_summary = client.chat.completions.create(
+        if name == "get_weather_forecast":
+            geocoder.remember(place_of_stay, args["latitude"], args["longitude"])
+
+    if on_weather_data is not None:
+        on_weather_data(result)
+    weather_summary = await create_completion(
+        call_site="weather_summary",
+        on_delta=on_delta,
         model=model,
         messages=messages,
         tools=tools
@@ -308,46 +572,131 @@ def get_weather_forecast_summary(place_of_stay:str, check_in_date:str, check_out
     return weather_summary, result
 
 
-def review_hotels(city_name:str, reviews_json_file_path:str):
-    logger.info(f"Searching hotels...")
-    response = requests.get(f"http://localhost:8084/hotels?city={city_name}&ratings=%5B5%2C4%2C3%5D")
-
-    
-    if response.status_code == 500:
-        logger.error("Internal Server Error (500) encountered. Using already available hotel data.")
-        data = {
-            'hotels': [
-                {'name': 'VIVANTA BY TAJ SURYA'},
-                {'name': 'THE GATEWAY HOTEL CHURCH ROAD'},
-                {'name': 'SAVOY HOTEL'},
-                {'name': 'CLARION HOTEL COIMBATORE'},
-                {'name': 'THE RESIDENCY COIMBATORE'},
-                {'name': 'VIVANTA BY TAJ M G ROAD'},
-                {'name': 'JW MARRIOTT HOTEL BENGALURU'},
-                {'name': 'THE OBEROI, BANGALORE'},
-                {'name': 'LEMON TREE HOTEL WHITEFIELD'},
-                {'name': 'GINGER BANGALORE WHITEFIELD'},
-                {'name': 'THE ZURI WHITEFIELD BENGALURU'}
-            ]
-        }
+def format_hotel_reviews(reviews_json_file_path:str, city_name:str, hotel_name:str, query:str = None):
+    """Ranking prompt text for one hotel, empty when the hotel has no reviews."""
+    relevant_only = bool(query and REVIEW_TOP_K)
+    digest = get_digest_store(reviews_json_file_path).get_digest(city_name, hotel_name) if REVIEW_DIGESTS else None
+    if relevant_only:
+        # Only the reviews most relevant to what the user asked for. The index needs numpy, load it on first use
+        from review_index import get_review_index
+        reviews = get_review_index(reviews_json_file_path).search(city_name, hotel_name, query, REVIEW_TOP_K)
+    elif digest is None:
+        # Hotels without a digest fall back to their plain reviews
+        reviews = get_reviews_by_city_and_hotel(reviews_json_file_path, city_name, hotel_name)
     else:
+        reviews = []
+
+    if digest is None and not reviews:
+        return ""
+    text = format_digest(hotel_name, digest) if digest is not None else f"\nHotel name: {hotel_name}"
+
+    label = "Relevant review" if relevant_only else "Review"
+    for i, review in enumerate(reviews):
+        text += (f"\n{label} {i} (posted on {review['date']}): {review['comment']}")
+    return text + "\n" + "-" * 50
+
+
+def needs_sentiments(candidates: int) -> bool:
+    """
+    Sentiments cost a round trip to the hotels API. They only matter when the
+    pre-ranking scores are the final ranking, or decide which hotels the LLM sees.
+    """
+    if RANKING_MODE == "algorithmic":
+        return True
+    return 0 < PRE_RANK_SHORTLIST < candidates
+
+
+async def get_hotel_sentiments(hotel_ids):
+    """Sentiments from the hotels API batch endpoint keyed by hotel id. Empty if unavailable."""
+    if not hotel_ids:
+        return {}
+    import httpx
+
+    try:
+        response = await request_with_retries(get_http_client(), "POST", f"{HOTELS_API_URL}/hotels/reviews/batch",
+                                              json={"hotel_ids": hotel_ids}, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    except (UpstreamUnavailable, httpx.HTTPError, ValueError) as e:
+        logger.warning(f"Hotel sentiments unavailable, pre-ranking without them: {e}")
+        return {}
+
+
+@tracing.traced("pre_ranking")
+async def shortlist_hotels(city_name:str, reviews_json_file_path:str, hotels):
+    """Score hotels with reviews on structured signals and keep the best PRE_RANK_SHORTLIST."""
+    digest_store = get_digest_store(reviews_json_file_path)
+    candidates = []
+    for hotel in hotels:
+        digest = digest_store.get_digest(city_name, hotel['name'])
+        if digest:
+            candidates.append({
+                "hotel_name": hotel['name'],
+                "hotel_id": hotel.get('hotelId'),
+                "reviews": get_reviews_by_city_and_hotel(reviews_json_file_path, city_name, hotel['name']),
+                "digest": digest,
+            })
+
+    if needs_sentiments(len(candidates)):
+        sentiments = await get_hotel_sentiments([candidate["hotel_id"] for candidate in candidates if candidate["hotel_id"]])
+        for candidate in candidates:
+            candidate["sentiment"] = sentiments.get(candidate["hotel_id"])
+
+    ranked = pre_rank(candidates)
+    logger.info(f"Pre-ranking: {[(candidate['hotel_name'], candidate['score']) for candidate in ranked]}")
+    return ranked[:PRE_RANK_SHORTLIST] if PRE_RANK_SHORTLIST else ranked
+
+
+@tracing.traced("hotels_http")
+async def search_hotels(city_name:str, reviews_json_file_path:str):
+    """
+    Hotels for a city from the hotels API. When it fails, the last good response
+    for the city is served, and failing that the hotels of the reviews knowledge base.
+    """
+    import httpx
+
+    try:
+        response = await request_with_retries(get_http_client(), "GET", f"{HOTELS_API_URL}/hotels?city={city_name}&ratings=%5B5%2C4%2C3%5D",
+                                              timeout=30)
+        response.raise_for_status()
         data = response.json()
-        logger.info("Response received successfully")
-        data = response.json()
+    except (UpstreamUnavailable, httpx.HTTPError, ValueError) as e:
+        last_good = last_good_hotels.get(city_name)
+        if last_good is not None:
+            data, saved_at = last_good
+            logger.error(f"Hotels API failed ({e}). Using hotel data saved {datetime.fromtimestamp(saved_at):%Y-%m-%d %H:%M}.")
+            return data
+        logger.error(f"Hotels API failed ({e}). Using hotels from the reviews knowledge base.")
+        return {'hotels': [{'name': name} for name in get_review_store(reviews_json_file_path).hotel_names(city_name)]}
+
+    logger.info("Response received successfully")
+    last_good_hotels.set(city_name, data)
+    # The hotels API resolved this city, let the fast path recognise it next time
+    fast_path_parser.add_cities([data.get('city') or city_name])
+    geocoder.learn_from_hotels(city_name, data.get('hotels') or [])
+    return data
+
+
+async def review_hotels(city_name:str, reviews_json_file_path:str, query:str = None, on_delta=None):
+    logger.info(f"Searching hotels...")
+    data = await search_hotels(city_name, reviews_json_file_path)
+
+    hotels = [hotel for hotel in data['hotels'] if not hotel['name'].startswith('TEST')]
+    shortlist = await shortlist_hotels(city_name, reviews_json_file_path, hotels)
+
+    if RANKING_MODE == "algorithmic" and len(shortlist) >= 3:
+        logger.info("Ranking hotels from pre-ranking scores...")
+        return HotelRankingsResponse(**{f"rank_{i + 1}": explain_ranking(candidate) for i, candidate in enumerate(shortlist[:3])})
 
     logger.info(f"Summarizing reviews...")
     reviews_string = ""
     hotels_list = []
-    for hotel in data['hotels']:
-        if not hotel['name'].startswith('TEST'):
-            reviews = get_reviews_by_city_and_hotel(reviews_json_file_path, 'Bengaluru', hotel['name'])
-
-            if reviews:
-                hotels_list.append(hotel['name'])
-                reviews_string += (f"\nHotel name: {hotel['name']}")
-                for i, review in enumerate(reviews):
-                    reviews_string += (f"\nReview {i} (posted on {review['date']}): {review['comment']}")
-                reviews_string += "\n" + "-" * 50
+    with tracing.span("review_loading"):
+        for candidate in shortlist:
+            hotel_reviews = format_hotel_reviews(reviews_json_file_path, city_name, candidate['hotel_name'], query)
+            if hotel_reviews:
+                hotels_list.append(candidate['hotel_name'])
+                reviews_string += hotel_reviews
     
     # System prompt for hotel ranking
     system_prompt = f"""
@@ -369,37 +718,47 @@ def review_hotels(city_name:str, reviews_json_file_path:str):
         - Highlight both positive aspects (pros) and negative aspects (cons) for each hotel.
 
         Output should strictly be in below json format:
-        {json.dumps(HotelRankingsResponse.model_json_schema(), indent=2)}
+        {schema_json(HotelRankingsResponse)}
     """
 
-    completion_reviews = client.chat.completions.create(
+    return await create_completion(
+        call_site="hotel_ranking",
+        parse=parse_content(HotelRankingsResponse),
+        on_delta=on_delta,
         model=model,
         messages=[
             {
                 "role": "system",
                 "content": system_prompt,
             },
-            {"role": "user", "content": f"Based on the following reviews, summarise and choose the top 3 hotels. Reviews:\n{reviews_string}"},
+            {"role": "user", "content": f"Based on the following {'review digests' if REVIEW_DIGESTS else 'reviews'}, summarise and choose the top 3 hotels. Reviews:\n{reviews_string}"},
         ],
         response_format={"type": "json_object"},
         temperature=0.7
     )
 
-    return HotelRankingsResponse.model_validate_json(completion_reviews.choices[0].message.content)
 
+async def get_weather(place_of_stay:str, check_in_date:str, check_out_date:str):
+    logger.info("Getting Weather Forecast...")
+    weather_summary, weather_data = await get_weather_forecast_summary(place_of_stay, check_in_date, check_out_date)
+    weather_summary = weather_summary.choices[0].message.content
 
-def process_accomodation_search(input: str, reviews_json_file_path:str):
+    logger.info(f"Weather data: {weather_data}")
+    logger.info(f"Weather summary: {weather_summary}")
+    return weather_summary, weather_data
+
+
+@tracing.traced("accomodation_search")
+async def process_accomodation_search_async(input: str, reviews_json_file_path:str):
     result = {}
 
-    logger.info("Checking if prompt is accomodation search request...")
-    is_accomodation_request = check_accomodation_request(input)
+    logger.info("Extracting details of stay...")
+    fast_path_parser.add_cities(get_review_store(reviews_json_file_path).city_names())
+    stay_details = await get_stay_details(input)
 
-    if not is_accomodation_request:
+    if stay_details is None:
         logger.info("Not an accomodation search request...")
         return None
-    
-    logger.info("Extracting details of stay...")
-    stay_details = extract_stay_details(input)
 
     place_of_stay = stay_details.city
     check_in_date = stay_details.start_date
@@ -409,25 +768,117 @@ def process_accomodation_search(input: str, reviews_json_file_path:str):
     result['check_out'] = check_out_date
     logger.info(f"Stay Details - City: {place_of_stay}, Start Date: {check_in_date}, End Date: {check_out_date}")
 
-    logger.info("Getting Weather Forecast...")
-    weather_summary, weather_data = get_weather_forecast_summary(place_of_stay, check_in_date, check_out_date)
-    weather_summary = weather_summary.choices[0].message.content
+    # Weather and hotel ranking only depend on the stay details, run them concurrently
+    (weather_summary, weather_data), top_3_hotels = await asyncio.gather(
+        get_weather(place_of_stay, check_in_date, check_out_date),
+        review_hotels(place_of_stay, reviews_json_file_path, query=input)
+    )
 
     result['weather_summary'] = weather_summary
     result['weather_data'] = weather_data
-    logger.info(f"Weather data: {weather_data}")
-    logger.info(f"Weather summary: {weather_summary}")
-
-    top_3_hotels = review_hotels(place_of_stay, reviews_json_file_path)
     result['top_3_hotels'] = top_3_hotels.model_dump()
 
     logger.info(f"Top 3 Hotels: {top_3_hotels}")
 
     return result
-    
+
+
+@tracing.traced("accomodation_search")
+async def stream_accomodation_search(input: str, reviews_json_file_path:str):
+    """
+    Async generator of (event, data) pairs as each stage completes: stay_details,
+    weather_data, weather_summary_delta..., weather_summary, top_3_hotels_delta...,
+    top_3_hotels and finally done. Weather and ranking events interleave.
+    """
+    fast_path_parser.add_cities(get_review_store(reviews_json_file_path).city_names())
+    stay_details = await get_stay_details(input)
+    if stay_details is None:
+        yield "not_accomodation_search", {}
+        return
+
+    place_of_stay = stay_details.city
+    check_in_date = stay_details.start_date
+    check_out_date = stay_details.end_date
+    yield "stay_details", {"city": place_of_stay, "check_in_date": check_in_date, "check_out": check_out_date}
+
+    events = asyncio.Queue()
+
+    async def weather_branch():
+        weather_summary, _ = await get_weather_forecast_summary(
+            place_of_stay, check_in_date, check_out_date,
+            on_weather_data=lambda data: events.put_nowait(("weather_data", data)),
+            on_delta=lambda delta: events.put_nowait(("weather_summary_delta", {"delta": delta}))
+        )
+        events.put_nowait(("weather_summary", {"weather_summary": weather_summary.choices[0].message.content}))
+
+    async def ranking_branch():
+        top_3_hotels = await review_hotels(
+            place_of_stay, reviews_json_file_path, query=input,
+            on_delta=lambda delta: events.put_nowait(("top_3_hotels_delta", {"delta": delta}))
+        )
+        events.put_nowait(("top_3_hotels", top_3_hotels.model_dump()))
+
+    async def run(branch):
+        try:
+            await branch
+            events.put_nowait((None, None))
+        except Exception as e:
+            events.put_nowait((None, e))
+
+    branches = [asyncio.create_task(run(weather_branch())), asyncio.create_task(run(ranking_branch()))]
+    try:
+        finished = 0
+        while finished < len(branches):
+            event, data = await events.get()
+            if event is None:
+                # A branch finished, data holds its exception if it failed
+                finished += 1
+                if data is not None:
+                    raise data
+                continue
+            yield event, data
+    finally:
+        for branch in branches:
+            branch.cancel()
+
+    yield "done", {}
+
+
+def process_accomodation_search(input: str, reviews_json_file_path:str):
+    # Blocking wrapper for the CLI
+    return asyncio.run(closing_http_client(process_accomodation_search_async(input, reviews_json_file_path)))
+
+
 if __name__ == "__main__":
-    reviews_json_file_path = 'knowledge_base/hotel_reviews.json'
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    from batch_runner import GROQ_RPM, GROQ_TPM, RateLimitedClient, open_prompts, read_prompts, run_batch
+
+    parser = argparse.ArgumentParser(description="Accomodation search assistant. Reads one prompt from stdin without --batch.")
+    parser.add_argument("--reviews", default='knowledge_base/hotel_reviews.json', help="Reviews knowledge base")
+    parser.add_argument("--batch", metavar="PATH", help="JSONL prompts to process, '-' for stdin")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL results, ids that succeeded are skipped on rerun")
+    parser.add_argument("--concurrency", type=int, default=4, help="Prompts processed at the same time")
+    parser.add_argument("--rpm", type=int, default=GROQ_RPM, help="LLM requests per minute, 0 for no limit")
+    parser.add_argument("--tpm", type=int, default=GROQ_TPM, help="LLM tokens per minute, 0 for no limit")
+    args = parser.parse_args()
 
-    user_input = input()
-    result = process_accomodation_search(user_input, reviews_json_file_path)
+    reviews_json_file_path = args.reviews
+
+    if args.batch:
+        client = RateLimitedClient(get_client(), rpm=args.rpm, tpm=args.tpm)
+
+        async def process(prompt):
+            return await process_accomodation_search_async(prompt, reviews_json_file_path)
+
+        with open_prompts(args.batch) as prompts:
+            asyncio.run(closing_http_client(run_batch(process, read_prompts(prompts), args.output, concurrency=args.concurrency)))
+    else:
+        user_input = input()
+        result = process_accomodation_search(user_input, reviews_json_file_path)
     # print(result)
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Groq quotas for the model in use, 0 disables the limit
+GROQ_RPM = int(os.environ.get("GROQ_RPM", "30"))
+GROQ_TPM = int(os.environ.get("GROQ_TPM", "12000"))
+
+# Completion tokens reserved per request before its usage is known
+COMPLETION_TOKENS_ESTIMATE = int(os.environ.get("GROQ_COMPLETION_TOKENS_ESTIMATE", "512"))
+
+
+# ---------------------------------------------------------------
+# Rate Limiting
+# ---------------------------------------------------------------
+
+class TokenBucket:
+    """
+    Holds up to `per_minute` units and refills continuously at per_minute / 60
+    per second. Waiters are served in arrival order. The level may go negative
+    when a reservation is corrected upwards, which delays later acquisitions.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        # A request larger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.level < amount:
+                await asyncio.sleep((amount - self.level) / self.rate)
+                self._refill()
+            self.level -= amount
+
+    def adjust(self, amount: float):
+        """Give back (positive) or take (negative) units after the real cost is known."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimitedClient:
+    """
+    Wraps an AsyncOpenAI client so chat completions wait for request and token
+    budget. Tokens are reserved from an estimate of the prompt size and
+    corrected with the usage reported in the response.
+    """
+
+    def __init__(self, client, rpm: int = GROQ_RPM, tpm: int = GROQ_TPM):
+        self._client = client
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.chat = self
+        self.completions = self
+
+    @staticmethod
+    def estimate_tokens(request) -> int:
+        # ~4 characters per token is close enough for English prompts
+        prompt = json.dumps(request.get("messages", []), default=str) + json.dumps(request.get("tools") or [])
+        return len(prompt) // 4 + (request.get("max_tokens") or COMPLETION_TOKENS_ESTIMATE)
+
+    async def create(self, **request):
+        estimate = self.estimate_tokens(request)
+        if self.requests is not None:
+            await self.requests.acquire()
+        if self.tokens is not None:
+            await self.tokens.acquire(estimate)
+
+        completion = await self._client.chat.completions.create(**request)
+
+        usage = getattr(completion, "usage", None)
+        if self.tokens is not None and usage is not None:
+            self.tokens.adjust(estimate - usage.total_tokens)
+        return completion
+
+
+# ---------------------------------------------------------------
+# Batch Runner
+# ---------------------------------------------------------------
+
+def read_prompts(file):
+    """
+    Yield (id, prompt) from JSONL lines {"id": ..., "prompt": ...}. Lines that
+    are not JSON objects are taken as the prompt itself; ids default to the
+    line number.
+    """
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = line
+        if isinstance(record, dict):
+            yield str(record.get("id", line_number)), record.get("prompt") or record.get("input", "")
+        else:
+            yield str(line_number), str(record)
+
+
+def completed_ids(output_path: str):
+    """
+    Ids already processed successfully according to the output file. Failed
+    ids are left out so a rerun retries them; a partially written last line
+    is ignored.
+    """
+    ids = set()
+    if not os.path.exists(output_path):
+        return ids
+    with open(output_path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+                if record.get("error") is None:
+                    ids.add(str(record["id"]))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+    return ids
+
+
+async def run_batch(process, prompts, output_path: str, concurrency: int = 4):
+    """
+    Run `process(prompt)` for every (id, prompt) with at most `concurrency` in
+    flight, appending {"id", "prompt", "result", "error", "elapsed"} lines to
+    `output_path`. Each line is flushed as soon as its prompt completes, so
+    a rerun skips every prompt that succeeded and retries the failed ones.
+    A retried id gets a new line after its failed one; the last line per id
+    is its outcome.
+    """
+    done = completed_ids(output_path)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    started_at = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as output:
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                prompt_id, prompt = item
+                record = {"id": prompt_id, "prompt": prompt, "result": None, "error": None}
+                t = time.monotonic()
+                try:
+                    record["result"] = await process(prompt)
+                    counts["ok"] += 1
+                except Exception as e:
+                    logger.exception(f"Prompt {prompt_id} failed")
+                    record["error"] = f"{type(e).__name__}: {e}"
+                    counts["failed"] += 1
+                record["elapsed"] = round(time.monotonic() - t, 3)
+                output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                output.flush()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for prompt_id, prompt in prompts:
+                if prompt_id in done:
+                    counts["skipped"] += 1
+                    continue
+                done.add(prompt_id)
+                await queue.put((prompt_id, prompt))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    elapsed = time.monotonic() - started_at
+    processed = counts["ok"] + counts["failed"]
+    logger.info(f"Batch finished: {counts} in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.2f} prompts/s)")
+    return counts
+
+
+def open_prompts(path: str):
+    """Context manager over the prompts file, or stdin for '-', which is left open afterwards."""
+    return nullcontext(sys.stdin) if path == "-" else open(path, encoding="utf-8")
@@ -0,0 +1,204 @@
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------
+# TTL Cache
+# ---------------------------------------------------------------
+
+class TTLCache:
+    """Bounded in-memory LRU cache where every entry expires after a TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._entries[key] = (value, time.time() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ---------------------------------------------------------------
+# Completion Cache
+# ---------------------------------------------------------------
+
+def _jsonable(value):
+    # Messages may contain SDK objects such as the assistant's tool call message
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    return str(value)
+
+
+async def stream_chat_completion(client, on_delta, **request):
+    """
+    Run a streaming chat completion, passing every content delta to `on_delta`,
+    and return the assembled ChatCompletion. Token usage is only streamed when
+    asked for; it arrives in a last chunk without choices.
+    """
+    from openai.types.chat import ChatCompletion
+
+    stream_options = {**(request.pop("stream_options", None) or {}), "include_usage": True}
+    stream = await client.chat.completions.create(stream=True, stream_options=stream_options, **request)
+    content = []
+    completion_id, created, finish_reason, usage = "", 0, "stop", None
+    async for chunk in stream:
+        completion_id, created = chunk.id, chunk.created
+        usage = chunk.usage or usage
+        for choice in chunk.choices:
+            if choice.delta.content:
+                content.append(choice.delta.content)
+                on_delta(choice.delta.content)
+            finish_reason = choice.finish_reason or finish_reason
+
+    return ChatCompletion.model_validate({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": request.get("model", ""),
+        "choices": [{"index": 0, "finish_reason": finish_reason,
+                     "message": {"role": "assistant", "content": "".join(content)}}],
+        "usage": usage.model_dump() if usage is not None else None,
+    })
+
+
+class CompletionCache:
+    """
+    Content-addressed cache of chat completions in a local SQLite file.
+
+    The key is a hash of the request fields that determine the answer
+    (model, messages, response_format, temperature, tools). Every call site
+    has its own TTL and hit/miss counters; the least recently used rows are
+    evicted beyond `max_entries`.
+    """
+
+    KEY_FIELDS = ("model", "messages", "response_format", "temperature", "tools")
+
+    def __init__(self, path: str, max_entries: int = 10000, ttls: dict = None, default_ttl: float = 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, call_site TEXT NOT NULL, "
+            "value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed_at ON completions (accessed_at)")
+
+    def key(self, **request) -> str:
+        fields = {field: request.get(field) for field in self.KEY_FIELDS}
+        data = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=_jsonable)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, call_site: str, value: str):
+        now = time.time()
+        ttl = self.ttls.get(call_site, self.default_ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, call_site, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, call_site, value, now + ttl, now)
+            )
+            self._conn.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+
+    async def create(self, client, call_site: str, on_delta=None, validate=None, **request):
+        """
+        Return a cached ChatCompletion for the request, calling `client` on a miss.
+        With `on_delta` the completion is streamed; a cache hit is delivered as one delta.
+        `validate(completion)` rejects a completion by raising: a new one is then
+        not stored, a stored one is dropped and requested again.
+        """
+        from openai.types.chat import ChatCompletion
+
+        key = self.key(**request)
+        cached = self.get(key)
+        if cached is not None:
+            completion = ChatCompletion.model_validate_json(cached)
+            try:
+                if validate is not None:
+                    validate(completion)
+            except Exception as e:
+                logger.warning(f"Dropping cached {call_site} completion that does not validate: {e}")
+                self.delete(key)
+            else:
+                self.hits[call_site] += 1
+                tracing.add("cache_hits")
+                if on_delta is not None and completion.choices[0].message.content:
+                    on_delta(completion.choices[0].message.content)
+                return completion
+
+        self.misses[call_site] += 1
+        if on_delta is not None:
+            completion = await stream_chat_completion(client, on_delta, **request)
+        else:
+            completion = await client.chat.completions.create(**request)
+        if validate is not None:
+            validate(completion)
+        self.set(key, call_site, completion.model_dump_json())
+        return completion
+
+    def stats(self):
+        return {
+            call_site: {"hits": self.hits[call_site], "misses": self.misses[call_site]}
+            for call_site in sorted(set(self.hits) | set(self.misses))
+        }
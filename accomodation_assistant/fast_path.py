@@ -0,0 +1,170 @@
+import re
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+from review_store import CITY_ALIASES
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+
+# Words that make a prompt an accomodation search without asking the LLM
+ACCOMODATION_WORDS = re.compile(
+    r"\b(hotels?|stay|staying|accomm?odations?|rooms?|resorts?|hostels?|lodges?|lodging|guest ?house|check[- ]?in)\b",
+    re.IGNORECASE
+)
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+# A full month name or its abbreviation as a whole word, so "mayor" or "decent" are no dates
+MONTH_NAME = r"(" + "|".join(m[:3] + (f"(?:{m[3:]})?" if len(m) > 3 else "") for m in MONTHS) + r"|sept)\b"
+DAY_MONTH_DATE = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+" + MONTH_NAME + r"\.?,?(?:\s+(\d{4}))?\b", re.IGNORECASE)
+MONTH_DAY_DATE = re.compile(r"\b" + MONTH_NAME + r"\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?(?:\s+(\d{4}))?\b", re.IGNORECASE)
+RELATIVE_DAY = re.compile(r"\b(day after tomorrow|tomorrow|today|tonight)\b", re.IGNORECASE)
+WEEKDAY = re.compile(r"\b(next|this|on|coming)\s+(" + "|".join(WEEKDAYS) + r")\b", re.IGNORECASE)
+DURATION = re.compile(r"\bfor\s+(a|one|two|three|four|five|six|seven|\d{1,2})\s+(nights?|days?|weeks?)\b", re.IGNORECASE)
+# Open-Meteo forecasts at most 16 days, longer stays are left to the LLM
+MAX_NIGHTS = 16
+
+NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7}
+
+
+class FastPathParser:
+    """
+    Rule-based extraction of city and stay dates for simple prompts such as
+    "hotel in Bengaluru from 2025-04-01 to 2025-04-03" or
+    "stay in Coimbatore next Friday for 2 nights".
+
+    `parse` returns None unless the prompt is clearly an accomodation search
+    with exactly one known city and a complete date range, so callers can
+    fall back to the LLM for everything else.
+    """
+
+    def __init__(self, cities=()):
+        self._cities = {}
+        self._pattern = None
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.add_cities(cities)
+
+    def add_cities(self, cities):
+        with self._lock:
+            new = {city.casefold(): city for city in cities if city and city.casefold() not in self._cities}
+            if not new:
+                return
+            self._cities.update(new)
+            names = sorted(set(self._cities) | set(CITY_ALIASES), key=len, reverse=True)
+            self._pattern = re.compile(r"\b(" + "|".join(re.escape(name) for name in names) + r")\b", re.IGNORECASE)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    def _find_city(self, text: str):
+        if self._pattern is None:
+            return None
+        found = set()
+        for match in self._pattern.finditer(text):
+            name = match.group(1).casefold()
+            found.add(self._cities.get(name) or CITY_ALIASES[name])
+        return found.pop() if len(found) == 1 else None
+
+    @staticmethod
+    def _resolve_years(values, today: date):
+        """
+        Turn (day, month, year or 0) tuples among `values` into dates. A missing
+        year comes from the neighbouring dates of the stay: the first such day on
+        or after the previous date, else the last one on or before the next
+        dated one, else the next such day from today.
+        """
+        resolved = [date(value[2], value[1], value[0]) if isinstance(value, tuple) and value[2] else value
+                    for value in values]
+        for position, value in enumerate(resolved):
+            if not isinstance(value, tuple):
+                continue
+            day, month, _ = value
+            later = next((other for other in resolved[position + 1:] if isinstance(other, date)), None)
+            if position == 0 and later is not None:
+                parsed = date(later.year, month, day)
+                resolved[position] = parsed if parsed <= later else date(later.year - 1, month, day)
+                continue
+            after = resolved[position - 1] if position else today
+            parsed = date(after.year, month, day)
+            resolved[position] = parsed if parsed >= after else date(after.year + 1, month, day)
+        return resolved
+
+    def _find_dates(self, text: str, today: date):
+        # (start, end, value) where calendar dates are (day, month, year or 0) until their year is known
+        matches = []
+        for match in ISO_DATE.finditer(text):
+            matches.append((match.start(), match.end(), (int(match.group(3)), int(match.group(2)), int(match.group(1)))))
+        for match in DAY_MONTH_DATE.finditer(text):
+            month = [m[:3] for m in MONTHS].index(match.group(2)[:3].lower()) + 1
+            matches.append((match.start(), match.end(), (int(match.group(1)), month, int(match.group(3) or 0))))
+        for match in MONTH_DAY_DATE.finditer(text):
+            month = [m[:3] for m in MONTHS].index(match.group(1)[:3].lower()) + 1
+            matches.append((match.start(), match.end(), (int(match.group(2)), month, int(match.group(3) or 0))))
+        for match in RELATIVE_DAY.finditer(text):
+            offset = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}[match.group(1).lower()]
+            matches.append((match.start(), match.end(), today + timedelta(days=offset)))
+        for match in WEEKDAY.finditer(text):
+            days_ahead = (WEEKDAYS.index(match.group(2).lower()) - today.weekday()) % 7
+            if days_ahead == 0 and match.group(1).lower() != "this":
+                days_ahead = 7
+            matches.append((match.start(), match.end(), today + timedelta(days=days_ahead)))
+
+        # "1 November 2 nights" also reads as "November 2": of overlapping matches the first, longest one wins
+        kept = []
+        for start, end, parsed in sorted(matches, key=lambda match: (match[0], -match[1])):
+            if not kept or start >= kept[-1][1]:
+                kept.append((start, end, parsed))
+
+        try:
+            return self._resolve_years([value for _, _, value in kept], today)
+        except ValueError:
+            # Impossible calendar date such as 2025-02-30
+            return None
+
+    @staticmethod
+    def _find_nights(text: str):
+        match = DURATION.search(text)
+        if match is None:
+            return None
+        count = match.group(1).lower()
+        count = NUMBER_WORDS.get(count) or int(count)
+        return count * 7 if match.group(2).lower().startswith("week") else count
+
+    def parse(self, text: str, today: date = None):
+        """Return {"city", "start_date", "end_date"} when confident, otherwise None."""
+        today = today or datetime.now().date()
+        self.attempts += 1
+
+        if not ACCOMODATION_WORDS.search(text):
+            return None
+
+        city = self._find_city(text)
+        dates = self._find_dates(text, today)
+        if city is None or not dates or len(dates) > 2:
+            return None
+
+        nights = self._find_nights(text)
+        start_date = dates[0]
+        if len(dates) == 2:
+            end_date = dates[1]
+        elif nights:
+            end_date = start_date + timedelta(days=nights)
+        else:
+            return None
+
+        if end_date <= start_date or start_date < today or (end_date - start_date).days > MAX_NIGHTS:
+            return None
+
+        self.hits += 1
+        logger.info(f"Fast path extracted stay details (hit rate {self.hit_rate:.0%})")
+        return {"city": city, "start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+
+
+fast_path_parser = FastPathParser(CITY_ALIASES.values())
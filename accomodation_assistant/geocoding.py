@@ -0,0 +1,78 @@
+import os
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base")
+
+
+# ---------------------------------------------------------------
+# Geocoder
+# ---------------------------------------------------------------
+
+class Geocoder:
+    """
+    Resolves a city name to (latitude, longitude) without asking the LLM.
+
+    Lookups go to a persistent JSON cache first and then to the bundled
+    gazetteer. The cache is filled from hotel geoCode fields returned by the
+    hotels API and from coordinates the weather tool call resolved earlier.
+    """
+
+    def __init__(self, gazetteer_path: str, cache_path: str):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._gazetteer = self._read(gazetteer_path)
+        self._cache = self._read(cache_path)
+
+    @staticmethod
+    def _key(city: str):
+        return city.strip().casefold()
+
+    def _read(self, path: str):
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as file:
+            return {self._key(city): tuple(coordinates) for city, coordinates in json.load(file).items()}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self._cache, file, indent=2)
+        os.replace(temp_path, self.cache_path)
+
+    def resolve(self, city: str):
+        key = self._key(city)
+        return self._cache.get(key) or self._gazetteer.get(key)
+
+    def remember(self, city: str, latitude: float, longitude: float):
+        coordinates = (round(float(latitude), 4), round(float(longitude), 4))
+        with self._lock:
+            if self._cache.get(self._key(city)) == coordinates:
+                return
+            self._cache[self._key(city)] = coordinates
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not persist geocode cache: {e}")
+
+    def learn_from_hotels(self, city: str, hotels):
+        """Use the centre of the hotels' geoCode fields as the city location."""
+        points = [
+            (hotel['geoCode']['latitude'], hotel['geoCode']['longitude'])
+            for hotel in hotels
+            if (hotel.get('geoCode') or {}).get('latitude') is not None
+            and (hotel.get('geoCode') or {}).get('longitude') is not None
+        ]
+        if points:
+            self.remember(city, sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+
+geocoder = Geocoder(
+    os.path.join(KNOWLEDGE_BASE_DIR, "gazetteer.json"),
+    os.environ.get("GEOCODE_CACHE_PATH", os.path.join(KNOWLEDGE_BASE_DIR, "geocode_cache.json"))
+)
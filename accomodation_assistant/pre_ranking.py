@@ -0,0 +1,133 @@
+import re
+import statistics
+from datetime import date, datetime
+
+# Weights of the structured signals in the pre-ranking score (each signal is on a 0-5 scale)
+SCORE_WEIGHTS = {
+    "recency_weighted_rating": 0.30,
+    "rating_mean": 0.20,
+    "safety": 0.25,
+    "sentiment": 0.25,
+}
+
+# Subtracted per point of rating standard deviation, so consistent hotels win ties
+VARIANCE_PENALTY = 0.15
+
+# Subtracted per year since the latest review
+STALENESS_PENALTY = 0.10
+
+SAFETY_POSITIVE = re.compile(r"\b(safe|secure|security (was|is) (good|great|excellent|tight)|well lit|24/7 security)\b", re.IGNORECASE)
+# Negated praise ("did not feel safe", "wasn't secure") is a negative report, so it is matched here first
+SAFETY_NEGATIVE = re.compile(
+    r"(\b(unsafe|insecure|theft|stolen|robbed|harass\w*|scared|dangerous|no security)\b"
+    r"|(\bnot|\bnever|\bhardly|n't)\s+(\w+\s+){0,2}(safe|secure)\b)",
+    re.IGNORECASE
+)
+
+ASPECT_NAMES = {"safety": "Safety", "cleanliness": "Cleanliness", "service": "Service"}
+
+
+# ---------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------
+
+def safety_score(reviews, digest):
+    """0-5 safety signal from keyword hits, falling back to ratings of reviews that mention safety."""
+    positive = negative = 0
+    for review in reviews:
+        comment = review.get("comment", "")
+        if SAFETY_NEGATIVE.search(comment):
+            negative += 1
+        elif SAFETY_POSITIVE.search(comment):
+            positive += 1
+    if positive or negative:
+        # Negative safety reports weigh twice as much as positive ones
+        return 5 * positive / (positive + 2 * negative)
+    return (digest["aspects"].get("safety") or {}).get("average_rating") or digest["rating_mean"]
+
+
+def sentiment_score(sentiment):
+    """0-5 signal from the /hotels/review/{hotel_id} sentiments (overallRating is 0-100)."""
+    if not sentiment:
+        return None
+    overall = sentiment.get("overallRating")
+    security = (sentiment.get("sentiments") or {}).get("security")
+    values = [value / 20 for value in (overall, security) if isinstance(value, (int, float))]
+    return sum(values) / len(values) if values else None
+
+
+def score_hotel(reviews, digest, sentiment=None, today: date = None):
+    today = today or date.today()
+    ratings = [review["rating"] for review in reviews if isinstance(review.get("rating"), (int, float))]
+    signals = {
+        "recency_weighted_rating": digest["recency_weighted_rating"],
+        "rating_mean": digest["rating_mean"],
+        "safety": safety_score(reviews, digest),
+        "sentiment": sentiment_score(sentiment),
+    }
+
+    # Missing signals do not count against a hotel, their weight is spread over the others
+    available = {name: value for name, value in signals.items() if value is not None}
+    total_weight = sum(SCORE_WEIGHTS[name] for name in available)
+    score = sum(SCORE_WEIGHTS[name] * value for name, value in available.items()) / total_weight if total_weight else 0.0
+
+    stdev = statistics.pstdev(ratings) if len(ratings) > 1 else 0.0
+    score -= VARIANCE_PENALTY * stdev
+    if digest.get("latest_review"):
+        age_days = (today - datetime.strptime(digest["latest_review"], "%Y-%m-%d").date()).days
+        score -= STALENESS_PENALTY * max(age_days, 0) / 365
+
+    return round(score, 3), {**signals, "rating_stdev": round(stdev, 2)}
+
+
+def pre_rank(candidates, today: date = None):
+    """
+    Score and sort candidate hotels, best first.
+
+    `candidates` is a list of dicts with hotel_name, reviews, digest and an
+    optional sentiment. Each returned dict also carries score and signals.
+    """
+    ranked = []
+    for candidate in candidates:
+        score, signals = score_hotel(candidate["reviews"], candidate["digest"], candidate.get("sentiment"), today)
+        ranked.append({**candidate, "score": score, "signals": signals})
+    return sorted(ranked, key=lambda candidate: candidate["score"], reverse=True)
+
+
+# ---------------------------------------------------------------
+# Algorithmic ranking
+# ---------------------------------------------------------------
+
+def _format(value):
+    return "n/a" if value is None else f"{value:.1f}"
+
+
+def explain_ranking(candidate):
+    """hotel_name, reason, pros and cons of a pre-ranked hotel, without an LLM."""
+    digest = candidate["digest"]
+    signals = candidate["signals"]
+    pros, cons = [], []
+    for aspect, values in digest["aspects"].items():
+        if not values["mentions"]:
+            continue
+        line = f"- {ASPECT_NAMES.get(aspect, aspect)}: {values['mentions']} reviews, average rating {values['average_rating']}"
+        if values["average_rating"] >= 4:
+            pros.append(line)
+        elif values["average_rating"] <= 3:
+            cons.append(line)
+
+    if signals["rating_stdev"] >= 1.5:
+        cons.append(f"- Inconsistent experiences (rating spread {signals['rating_stdev']})")
+    low_reviews = sum(count for star, count in digest["rating_distribution"].items() if int(star) <= 2)
+    if low_reviews:
+        cons.append(f"- {low_reviews} of {digest['review_count']} reviews rated 2 stars or lower")
+
+    reason = (f"Score {candidate['score']:.2f}: mean rating {_format(signals['rating_mean'])}, "
+              f"recent rating {_format(signals['recency_weighted_rating'])}, safety {_format(signals['safety'])}, "
+              f"guest sentiment {_format(signals['sentiment'])}.")
+    return {
+        "hotel_name": candidate["hotel_name"],
+        "reason": reason,
+        "pros": "\n".join(pros) or "- No standout strengths mentioned in reviews",
+        "cons": "\n".join(cons) or "- No recurring complaints in reviews",
+    }
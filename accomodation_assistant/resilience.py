@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base")
+
+RETRY_ATTEMPTS = int(os.environ.get("ASSISTANT_RETRY_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.environ.get("ASSISTANT_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.environ.get("ASSISTANT_RETRY_MAX_DELAY", "4"))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("ASSISTANT_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("ASSISTANT_BREAKER_RESET_TIMEOUT", "30"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when retries are exhausted or the host's circuit breaker is open."""
+
+
+# ---------------------------------------------------------------
+# Circuit Breaker
+# ---------------------------------------------------------------
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. After that one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+
+    Every call that `allow()` lets through must end in record_success,
+    record_failure or release, otherwise a half-open breaker stays closed to
+    everyone.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that got no answer, e.g. because it was cancelled, without counting it either way."""
+        self._trial_in_flight = False
+
+
+_breakers = {}
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers.setdefault(host, CircuitBreaker())
+    return breaker
+
+
+async def request_with_retries(http_client: "httpx.AsyncClient", method: str, url: str,
+                               retries: int = RETRY_ATTEMPTS, **kwargs) -> "httpx.Response":
+    """
+    Send an idempotent request, retrying transport errors and retryable status
+    codes with full-jitter exponential backoff. Non-retryable responses (2xx,
+    4xx) are returned as they are.
+    """
+    import httpx
+
+    breaker = get_breaker(url)
+    error = None
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise UpstreamUnavailable(f"Circuit open for {urlsplit(url).netloc}")
+
+        try:
+            response = await http_client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            error = f"{type(e).__name__}: {e}"
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled before the upstream answered, that says nothing about its health
+            breaker.release()
+            raise
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            error = f"HTTP {response.status_code}"
+
+        if attempt < retries:
+            tracing.add("retries")
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            logger.warning(f"{method} {url} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    raise UpstreamUnavailable(f"{method} {url} failed after {retries + 1} attempts: {error}")
+
+
+# ---------------------------------------------------------------
+# Last Good Responses
+# ---------------------------------------------------------------
+
+class LastGoodStore:
+    """Persists the last successful response per key so it can be served when the upstream fails."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self._entries = json.load(file)
+
+    @staticmethod
+    def _key(key: str):
+        return key.strip().casefold()
+
+    def get(self, key: str):
+        """Return (value, saved_at) or None."""
+        entry = self._entries.get(self._key(key))
+        return (entry["value"], entry["saved_at"]) if entry else None
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[self._key(key)] = {"value": value, "saved_at": time.time()}
+            if not self.path:
+                return
+            try:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as file:
+                    json.dump(self._entries, file, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save {self.path}: {e}")
+
+
+last_good_hotels = LastGoodStore(
+    os.environ.get("HOTELS_LAST_GOOD_PATH", os.path.join(KNOWLEDGE_BASE_DIR, "hotels_last_good.json"))
+)
@@ -0,0 +1,267 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import threading
+from datetime import date, datetime
+
+from review_store import fold_city, get_review_store
+
+logger = logging.getLogger(__name__)
+
+DIGEST_VERSION = 1
+
+# Reviews lose half of their weight in the recency score every RECENCY_HALF_LIFE_DAYS.
+# Weights are taken relative to the hotel's latest review: measured from any later day
+# they would all shrink by the same factor, which cancels out of the weighted mean, so
+# a digest never goes stale with time alone. How old the reviews are as a whole is
+# penalised when ranking (pre_ranking.STALENESS_PENALTY)
+RECENCY_HALF_LIFE_DAYS = 180
+
+# Digests recomputed at runtime are kept here, outside the repository, when set.
+# The digest file next to the knowledge base is only written by the offline build below
+DIGEST_CACHE_PATH = os.environ.get("REVIEW_DIGEST_CACHE_PATH", "")
+
+QUOTE_LENGTH = 220
+
+# Keywords used to extract per-aspect signals from review comments
+ASPECT_KEYWORDS = {
+    "safety": re.compile(r"\b(safe|safety|secure|security|unsafe|theft|stolen|guard|cctv|women|female|solo|night)\w*", re.IGNORECASE),
+    "cleanliness": re.compile(r"\b(clean|dirty|hygien|stain|smell|dust|cockroach|bedbug|mould|mold|tidy|spotless|maintain)\w*", re.IGNORECASE),
+    "service": re.compile(r"\b(staff|service|friendly|rude|helpful|courteous|hospitab|reception|front desk|manager|attentive)\w*", re.IGNORECASE),
+}
+
+
+# ---------------------------------------------------------------
+# Digest computation
+# ---------------------------------------------------------------
+
+def reviews_hash(reviews):
+    return hashlib.sha1(json.dumps(reviews, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _quote(comment: str):
+    comment = " ".join(comment.split())
+    return comment if len(comment) <= QUOTE_LENGTH else comment[:QUOTE_LENGTH].rsplit(" ", 1)[0] + "..."
+
+
+def _parse_date(value: str):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def build_digest(reviews, today: date = None):
+    """Aggregate the reviews of one hotel into a compact digest."""
+    today = today or date.today()
+    ratings = [review["rating"] for review in reviews if isinstance(review.get("rating"), (int, float))]
+
+    dated = [(_parse_date(review.get("date")), review["rating"]) for review in reviews
+             if isinstance(review.get("rating"), (int, float))]
+    dated = [(review_date, rating) for review_date, rating in dated if review_date is not None]
+    latest = max((review_date for review_date, _ in dated), default=None)
+    weighted_sum = weight_total = 0.0
+    for review_date, rating in dated:
+        weight = 0.5 ** ((latest - review_date).days / RECENCY_HALF_LIFE_DAYS)
+        weighted_sum += weight * rating
+        weight_total += weight
+
+    aspects = {}
+    for aspect, pattern in ASPECT_KEYWORDS.items():
+        mentioning = [review["rating"] for review in reviews
+                      if pattern.search(review.get("comment", "")) and isinstance(review.get("rating"), (int, float))]
+        aspects[aspect] = {
+            "mentions": len(mentioning),
+            "average_rating": round(sum(mentioning) / len(mentioning), 2) if mentioning else None,
+        }
+
+    # Best, worst and most recent review give the ranking model a feel for the range of opinions
+    quotes = []
+    by_rating = sorted(reviews, key=lambda review: review.get("rating", 0))
+    by_date = sorted(reviews, key=lambda review: review.get("date", ""))
+    for review in (by_rating[-1:] + by_rating[:1] + by_date[-1:]):
+        quote = {"rating": review.get("rating"), "date": review.get("date"), "text": _quote(review.get("comment", ""))}
+        if quote not in quotes:
+            quotes.append(quote)
+
+    return {
+        "review_count": len(reviews),
+        "rating_mean": round(sum(ratings) / len(ratings), 2) if ratings else None,
+        "rating_distribution": {str(star): ratings.count(star) for star in range(5, 0, -1)},
+        "recency_weighted_rating": round(weighted_sum / weight_total, 2) if weight_total else None,
+        "latest_review": by_date[-1].get("date") if by_date else None,
+        "aspects": aspects,
+        "quotes": quotes,
+        "computed_on": today.isoformat(),
+    }
+
+
+def format_digest(hotel_name: str, digest):
+    """Render a digest as the compact text block used in the ranking prompt, without the closing separator."""
+    aspects = ", ".join(
+        f"{aspect}: {values['mentions']} mentions, avg rating {values['average_rating']}"
+        for aspect, values in digest["aspects"].items() if values["mentions"]
+    )
+    distribution = " ".join(f"{star}*:{count}" for star, count in digest["rating_distribution"].items())
+    lines = [
+        f"\nHotel name: {hotel_name}",
+        f"Reviews: {digest['review_count']}, mean rating {digest['rating_mean']}, "
+        f"recency-weighted rating {digest['recency_weighted_rating']}, latest review {digest['latest_review']}",
+        f"Rating distribution: {distribution}",
+        f"Aspects: {aspects or 'none mentioned'}",
+    ]
+    for quote in digest["quotes"]:
+        lines.append(f"Quote ({quote['rating']}*, {quote['date']}): {quote['text']}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------
+# Digest Store
+# ---------------------------------------------------------------
+
+def default_digest_path(json_file: str):
+    root, _ = os.path.splitext(json_file)
+    return f"{root}_digests.json"
+
+
+class DigestStore:
+    """
+    Per-hotel review digests, built offline into a file next to the knowledge base.
+
+    Digests are keyed like the ReviewStore index and carry the hash of the
+    reviews they were built from, so an update only recomputes hotels whose
+    reviews changed, however old the digest file is. At runtime the hashes
+    are checked one city at a time, on its first lookup, so only the reviews
+    of cities in use are read. Recomputed digests are kept in memory and,
+    with a `cache_file`, saved there; the digest file itself is never
+    rewritten by a running assistant.
+    """
+
+    def __init__(self, json_file: str, digest_file: str = None, cache_file: str = DIGEST_CACHE_PATH):
+        self.review_store = get_review_store(json_file)
+        self.digest_file = digest_file or default_digest_path(json_file)
+        self.cache_file = cache_file
+        self._digests = None
+        self._source_mtime = None
+        # Cities whose digests were checked against their reviews, None once all were
+        self._checked = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(city_name: str, hotel_name: str):
+        return f"{fold_city(city_name)}|{hotel_name.casefold().strip()}"
+
+    @staticmethod
+    def _read_file(path: str):
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        return data.get("hotels", {}) if data.get("version") == DIGEST_VERSION else {}
+
+    def _read(self):
+        # Digests recomputed at runtime take precedence over the offline build
+        return {**self._read_file(self.digest_file), **self._read_file(self.cache_file)}
+
+    @staticmethod
+    def _write(path: str, digests):
+        # Several workers may save at once, each through its own temporary file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": DIGEST_VERSION, "hotels": digests}, file, indent=2)
+        os.replace(temp_path, path)
+
+    def _current(self):
+        # Everything is checked again when the knowledge base changed
+        mtime = os.stat(self.review_store.json_file).st_mtime_ns
+        if self._digests is None or mtime != self._source_mtime:
+            self._digests = self._read()
+            self._checked = set()
+            self._source_mtime = mtime
+        return self._digests
+
+    def _recompute(self, items, digests, today: date):
+        """Digests of `items`, reusing those in `digests` built from the same reviews."""
+        updated = {}
+        recomputed = 0
+        for (city_name, hotel_name), reviews in items:
+            key = self._key(city_name, hotel_name)
+            current = digests.get(key)
+            content_hash = reviews_hash(reviews)
+            if current is None or current["hash"] != content_hash:
+                current = {"hash": content_hash, "digest": build_digest(reviews, today)}
+                recomputed += 1
+            updated[key] = current
+        return updated, recomputed
+
+    def _save(self, path: str, digests):
+        if not path:
+            return
+        try:
+            self._write(path, digests)
+        except OSError as e:
+            logger.warning(f"Could not save review digests to {path}: {e}")
+
+    def update(self, today: date = None, save_to: str = None):
+        """
+        Recompute stale digests of the whole knowledge base and save them to
+        `save_to`, by default the cache file if any. Returns the number of
+        hotels recomputed.
+        """
+        today = today or date.today()
+        save_to = save_to or self.cache_file
+        with self._lock:
+            digests = self._current()
+            updated, recomputed = self._recompute(self.review_store.items(), digests, today)
+            if recomputed or len(updated) != len(digests):
+                self._save(save_to, updated)
+                logger.info(f"Recomputed {recomputed} of {len(updated)} hotel review digests")
+            self._digests = updated
+            self._checked = None
+            return recomputed
+
+    def _update_city(self, city_name: str):
+        city_key = fold_city(city_name)
+        with self._lock:
+            digests = self._current()
+            if self._checked is None or city_key in self._checked:
+                return
+            updated, recomputed = self._recompute(self.review_store.city_items(city_name), digests, date.today())
+            prefix = f"{city_key}|"
+            removed = [key for key in digests if key.startswith(prefix) and key not in updated]
+            if recomputed or removed:
+                for key in removed:
+                    del digests[key]
+                digests.update(updated)
+                self._save(self.cache_file, digests)
+                logger.info(f"Recomputed {recomputed} of {len(updated)} review digests of {city_name}")
+            self._checked.add(city_key)
+
+    def get_digest(self, city_name: str, hotel_name: str):
+        self._update_city(city_name)
+        entry = self._digests.get(self._key(city_name, hotel_name))
+        return entry["digest"] if entry else None
+
+
+_stores = {}
+
+
+def get_digest_store(json_file: str) -> DigestStore:
+    """Return the process-wide digest store for a knowledge base file."""
+    path = os.path.abspath(json_file)
+    store = _stores.get(path)
+    if store is None:
+        store = _stores.setdefault(path, DigestStore(path))
+    return store
+
+
+if __name__ == "__main__":
+    # Offline build: python review_digest.py knowledge_base/hotel_reviews.json
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    json_file = sys.argv[1] if len(sys.argv) > 1 else "knowledge_base/hotel_reviews.json"
+    # Only the digest file is read and written, whatever the runtime cache holds
+    store = DigestStore(os.path.abspath(json_file), cache_file="")
+    store.update(save_to=store.digest_file)
@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+import logging
+import threading
+import numpy as np
+
+from review_store import fold_city, get_review_store
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 3
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+# ---------------------------------------------------------------
+# Embedders
+# ---------------------------------------------------------------
+
+class HashingEmbedder:
+    """
+    Dependency free fallback: hashed unigrams and bigrams with sublinear term
+    frequency. Inverse document frequency is applied at query time, which
+    keeps document vectors independent of each other so the index can grow
+    incrementally.
+    """
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                vectors[row, zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+        np.log1p(vectors, out=vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """Dense CPU embeddings, used when sentence-transformers is installed and a model is configured."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts):
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder():
+    model_name = os.environ.get("REVIEW_EMBEDDING_MODEL", "")
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            logger.warning("sentence-transformers is not installed, using the hashing embedder")
+    return HashingEmbedder()
+
+
+# ---------------------------------------------------------------
+# Review Index
+# ---------------------------------------------------------------
+
+def default_index_dir(json_file: str):
+    root, _ = os.path.splitext(json_file)
+    return f"{root}_index"
+
+
+def review_hash(city_name: str, hotel_name: str, review):
+    data = json.dumps([city_name, hotel_name, review.get("date"), review.get("comment")], ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def city_dir_name(city_key: str):
+    slug = re.sub(r"[^a-z0-9]+", "-", city_key).strip("-")
+    return f"{slug or 'city'}-{hashlib.sha1(city_key.encode('utf-8')).hexdigest()[:8]}"
+
+
+class ReviewIndex:
+    """
+    Vector index over review comments stored as NumPy arrays next to the
+    knowledge base and memory-mapped at load. Each city has its own vectors,
+    built or checked on its first search, so only the reviews of cities in
+    use are read. Rebuilding only embeds reviews whose content hash is not
+    in the city's index yet.
+    """
+
+    def __init__(self, json_file: str, index_dir: str = None, embedder=None):
+        self.review_store = get_review_store(json_file)
+        self.index_dir = index_dir or default_index_dir(json_file)
+        self.embedder = embedder or create_embedder()
+        # city key -> {"rows", "vectors", "hotel_rows", "idf"}
+        self._cities = {}
+        self._source_mtime = None
+        self._lock = threading.Lock()
+
+    def _city_dir(self, city_key: str):
+        return os.path.join(self.index_dir, city_dir_name(city_key))
+
+    def _read_meta(self, city_key: str):
+        meta_path = os.path.join(self._city_dir(city_key), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as file:
+            meta = json.load(file)
+        if meta.get("version") != INDEX_VERSION or meta.get("embedder") != self.embedder.name:
+            return None
+        return meta
+
+    def _read(self, city_key: str):
+        meta = self._read_meta(city_key)
+        if meta is None:
+            return [], None
+        try:
+            vectors = np.load(os.path.join(self._city_dir(city_key), meta["vectors"]), mmap_mode="r")
+        except FileNotFoundError:
+            # Replaced by another process since the metadata was read
+            return [], None
+        return (meta["rows"], vectors) if len(vectors) == len(meta["rows"]) else ([], None)
+
+    def _write(self, city_key: str, rows, vectors):
+        """
+        Store a city's vectors under a name derived from their rows, then point
+        meta.json at them. Each step is an atomic rename of a file private to
+        this process, so concurrent builders never share a temporary file and
+        readers see either the old or the new vectors with their own rows.
+        """
+        city_dir = self._city_dir(city_key)
+        os.makedirs(city_dir, exist_ok=True)
+        previous = self._read_meta(city_key)
+
+        rows_hash = hashlib.sha1("".join(row["hash"] for row in rows).encode("utf-8")).hexdigest()[:16]
+        vectors_name = f"vectors-{rows_hash}.npy"
+        vectors_path = os.path.join(city_dir, vectors_name)
+        temp_path = f"{vectors_path}.{os.getpid()}.tmp.npy"
+        np.save(temp_path, vectors)
+        os.replace(temp_path, vectors_path)
+
+        meta_path = os.path.join(city_dir, "meta.json")
+        temp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": INDEX_VERSION, "embedder": self.embedder.name, "vectors": vectors_name, "rows": rows}, file)
+        os.replace(temp_path, meta_path)
+
+        # Readers that already mapped the old vectors keep them until they are done
+        if previous is not None and previous.get("vectors") not in (None, vectors_name):
+            try:
+                os.remove(os.path.join(city_dir, previous["vectors"]))
+            except OSError:
+                pass
+        return np.load(vectors_path, mmap_mode="r")
+
+    def _build_city(self, city_name: str):
+        city_key = fold_city(city_name)
+        old_rows, old_vectors = self._read(city_key)
+        old_positions = {row["hash"]: position for position, row in enumerate(old_rows)}
+
+        rows, sources, new_texts = [], [], []
+        for (city_name, hotel_name), reviews in self.review_store.city_items(city_name):
+            for position, review in enumerate(reviews):
+                content_hash = review_hash(city_name, hotel_name, review)
+                rows.append({"city": city_name, "hotel": hotel_name, "review": position, "hash": content_hash})
+                if content_hash in old_positions:
+                    sources.append(("old", old_positions[content_hash]))
+                else:
+                    sources.append(("new", len(new_texts)))
+                    new_texts.append(review.get("comment", ""))
+
+        # The stored vectors follow the old row order, so they are only reused when it is the same
+        unchanged = [row["hash"] for row in rows] == [row["hash"] for row in old_rows]
+        if unchanged:
+            vectors = old_vectors
+        else:
+            embedded = self.embedder.embed(new_texts) if new_texts else None
+            vectors = np.zeros((len(rows), self.embedder.dim), dtype=np.float32)
+            for row, (source, position) in enumerate(sources):
+                vectors[row] = old_vectors[position] if source == "old" else embedded[position]
+            vectors = self._write(city_key, rows, vectors)
+            logger.info(f"Embedded {len(new_texts)} new reviews of {city_name}, its index holds {len(rows)}")
+
+        self._cities[city_key] = self._load(rows, vectors)
+        return len(new_texts)
+
+    def _load(self, rows, vectors):
+        hotel_rows = {}
+        for row, meta in enumerate(rows):
+            hotel_rows.setdefault(meta["hotel"], []).append(row)
+
+        # Inverse document frequency over the city's reviews, the ones a search ranks
+        idf = None
+        if isinstance(self.embedder, HashingEmbedder) and len(rows):
+            document_frequency = np.count_nonzero(vectors, axis=0)
+            idf = np.log((1 + len(rows)) / (1 + document_frequency)).astype(np.float32) + 1
+        return {"rows": rows, "vectors": vectors, "hotel_rows": hotel_rows, "idf": idf}
+
+    def _check_source(self):
+        mtime = os.stat(self.review_store.json_file).st_mtime_ns
+        if mtime != self._source_mtime:
+            self._cities = {}
+            self._source_mtime = mtime
+
+    def build(self, city_name: str = None):
+        """
+        Bring the index of a city, or of every city, in line with the knowledge
+        base. Returns the number of reviews embedded.
+        """
+        with self._lock:
+            self._check_source()
+            city_names = [city_name] if city_name is not None else self.review_store.city_names()
+            return sum(self._build_city(name) for name in city_names)
+
+    def _city(self, city_name: str):
+        with self._lock:
+            self._check_source()
+            city = self._cities.get(fold_city(city_name))
+            if city is None:
+                self._build_city(city_name)
+                city = self._cities[fold_city(city_name)]
+            return city
+
+    def search(self, city_name: str, hotel_name: str, query: str, k: int = 3):
+        """Return the k reviews of a hotel most similar to the query."""
+        city = self._city(city_name)
+        rows = city["hotel_rows"].get(hotel_name.casefold().strip())
+        if not rows:
+            return []
+
+        query_vector = self.embedder.embed([query])[0]
+        candidates = np.asarray(city["vectors"][rows])
+        if city["idf"] is not None:
+            query_vector = query_vector * city["idf"]
+            candidates = candidates * city["idf"]
+        scores = candidates @ query_vector / np.maximum(np.linalg.norm(candidates, axis=1), 1e-12)
+
+        reviews = self.review_store.get_reviews(city_name, hotel_name)
+        best = np.argsort(-scores, kind="stable")[:k]
+        return [reviews[city["rows"][rows[i]]["review"]] for i in best]
+
+
+_indexes = {}
+
+
+def get_review_index(json_file: str) -> ReviewIndex:
+    """Return the process-wide review index for a knowledge base file."""
+    path = os.path.abspath(json_file)
+    index = _indexes.get(path)
+    if index is None:
+        index = _indexes.setdefault(path, ReviewIndex(path))
+    return index
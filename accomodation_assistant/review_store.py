@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Cities whose hotels are kept in memory at once, least recently used are dropped
+MAX_CACHED_CITIES = int(os.environ.get("REVIEW_STORE_MAX_CITIES", "64"))
+
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+
+# Common alternative spellings of knowledge base cities
+CITY_ALIASES = {
+    "bangalore": "Bengaluru",
+    "kovai": "Coimbatore",
+}
+
+
+def _fold(name: str):
+    return name.casefold().strip()
+
+
+def canonical_city(city_name: str):
+    """The knowledge base spelling of a city for its common alternative names."""
+    return CITY_ALIASES.get(_fold(city_name), city_name)
+
+
+def fold_city(city_name: str):
+    """Lookup key of a city, the same for all of its spellings."""
+    return _fold(canonical_city(city_name))
+
+
+# ---------------------------------------------------------------
+# Knowledge base sources
+# ---------------------------------------------------------------
+
+class JsonSource:
+    """
+    The nested {"cities": [{"city": ..., "hotels": [...]}]} document.
+
+    With ijson installed the file is walked incrementally and only hotels of
+    the requested city are materialised; each city object must list "city"
+    before "hotels". Without ijson the whole document is loaded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def iter_hotels(self, city_key: str = None):
+        try:
+            import ijson
+        except ImportError:
+            yield from self._iter_loaded(city_key)
+            return
+
+        with open(self.path, "rb") as file:
+            parser = ijson.parse(file, use_float=True)
+            city_name = None
+            for prefix, event, value in parser:
+                if prefix == "cities.item.city":
+                    city_name = value
+                elif prefix == "cities.item.hotels.item" and event == "start_map":
+                    if city_key is not None and (city_name is None or fold_city(city_name) != city_key):
+                        self._skip_hotel(parser)
+                        continue
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    for prefix, event, value in parser:
+                        builder.event(event, value)
+                        if prefix == "cities.item.hotels.item" and event == "end_map":
+                            break
+                    yield city_name, builder.value
+
+    @staticmethod
+    def _skip_hotel(parser):
+        for prefix, event, _ in parser:
+            if prefix == "cities.item.hotels.item" and event == "end_map":
+                return
+
+    def _iter_loaded(self, city_key: str = None):
+        with open(self.path, encoding="utf-8") as file:
+            data = json.load(file)
+        for city in data.get("cities", []):
+            if city_key is None or fold_city(city["city"]) == city_key:
+                for hotel in city.get("hotels", []):
+                    yield city["city"], hotel
+
+    def city_names(self):
+        try:
+            import ijson
+        except ImportError:
+            with open(self.path, encoding="utf-8") as file:
+                return [city["city"] for city in json.load(file).get("cities", [])]
+        with open(self.path, "rb") as file:
+            return [value for prefix, event, value in ijson.parse(file) if prefix == "cities.item.city"]
+
+
+class JsonLinesSource:
+    """
+    One hotel per line: {"city": ..., "hotel_id": ..., "hotel_name": ..., "reviews": [...]}.
+
+    The first access records the byte offset of every line per city, later
+    lookups only parse the lines of the requested city.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets = None
+        self._city_names = None
+
+    def _build_offsets(self):
+        offsets, city_names = {}, {}
+        with open(self.path, "rb") as file:
+            offset = file.tell()
+            for line in iter(file.readline, b""):
+                if line.strip():
+                    city_name = json.loads(line)["city"]
+                    offsets.setdefault(fold_city(city_name), []).append(offset)
+                    city_names.setdefault(fold_city(city_name), city_name)
+                offset = file.tell()
+        self._offsets, self._city_names = offsets, list(city_names.values())
+
+    def iter_hotels(self, city_key: str = None):
+        if city_key is None:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        hotel = json.loads(line)
+                        yield hotel["city"], hotel
+            return
+
+        if self._offsets is None:
+            self._build_offsets()
+        with open(self.path, "rb") as file:
+            for offset in self._offsets.get(city_key, []):
+                file.seek(offset)
+                hotel = json.loads(file.readline())
+                yield hotel["city"], hotel
+
+    def city_names(self):
+        if self._city_names is None:
+            self._build_offsets()
+        return list(self._city_names)
+
+
+class SQLiteSource:
+    """Table hotels(city_key, hotel_key, city, hotel_id, hotel_name, reviews) queried per city."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self):
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def iter_hotels(self, city_key: str = None):
+        query = "SELECT city, hotel_id, hotel_name, reviews FROM hotels"
+        params = ()
+        if city_key is not None:
+            query += " WHERE city_key = ?"
+            params = (city_key,)
+        conn = self._connect()
+        try:
+            for city_name, hotel_id, hotel_name, reviews in conn.execute(query, params):
+                yield city_name, {"hotel_id": hotel_id, "hotel_name": hotel_name, "reviews": json.loads(reviews)}
+        finally:
+            conn.close()
+
+    def city_names(self):
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT city FROM hotels GROUP BY city_key ORDER BY MIN(rowid)")]
+        finally:
+            conn.close()
+
+
+def open_source(path: str):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in JSONL_EXTENSIONS:
+        return JsonLinesSource(path)
+    if extension in SQLITE_EXTENSIONS:
+        return SQLiteSource(path)
+    return JsonSource(path)
+
+
+# ---------------------------------------------------------------
+# Review Store
+# ---------------------------------------------------------------
+
+class ReviewStore:
+    """Lazily loaded index over the hotel reviews knowledge base.
+
+    Hotels are indexed by case-folded (city, hotel_name) one city at a time,
+    on the first lookup for that city, so memory follows the cities in use
+    rather than the whole corpus. Everything is dropped when the file's
+    modification time changes. The knowledge base may be nested JSON, JSONL
+    or SQLite (see open_source).
+    """
+
+    def __init__(self, json_file: str):
+        self.json_file = json_file
+        self._source = open_source(json_file)
+        self._cities = OrderedDict()
+        self._city_names = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(city_name: str, hotel_name: str):
+        return (fold_city(city_name), _fold(hotel_name))
+
+    def _refresh(self):
+        mtime = os.stat(self.json_file).st_mtime_ns
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            logger.info(f"Opening reviews knowledge base {self.json_file}")
+            self._source = open_source(self.json_file)
+            self._cities = OrderedDict()
+            self._city_names = None
+            self._mtime = mtime
+
+    def _city(self, city_key: str):
+        with self._lock:
+            hotels = self._cities.get(city_key)
+            if hotels is None:
+                hotels = {_fold(hotel["hotel_name"]): hotel.get("reviews", [])
+                          for _, hotel in self._source.iter_hotels(city_key)}
+                self._cities[city_key] = hotels
+                while len(self._cities) > MAX_CACHED_CITIES:
+                    self._cities.popitem(last=False)
+            else:
+                self._cities.move_to_end(city_key)
+            return hotels
+
+    def get_reviews(self, city_name: str, hotel_name: str):
+        self._refresh()
+        key, hotel_key = self._key(city_name, hotel_name)
+        return self._city(key).get(hotel_key, [])
+
+    def hotel_names(self, city_name: str):
+        """Hotel names of a city as spelled in the knowledge base."""
+        self._refresh()
+        return [hotel["hotel_name"] for _, hotel in self._source.iter_hotels(fold_city(city_name))]
+
+    def city_items(self, city_name: str):
+        """((city, hotel_name), reviews) with case-folded keys for the hotels of one city."""
+        self._refresh()
+        city_key = fold_city(city_name)
+        for hotel_key, reviews in self._city(city_key).items():
+            yield (city_key, hotel_key), reviews
+
+    def items(self):
+        """Stream ((city, hotel_name), reviews) with case-folded keys over the whole knowledge base."""
+        self._refresh()
+        for city_name, hotel in self._source.iter_hotels():
+            yield self._key(city_name, hotel["hotel_name"]), hotel.get("reviews", [])
+
+    def cities(self):
+        return sorted({fold_city(city) for city in self.city_names()})
+
+    def city_names(self):
+        """City names as spelled in the knowledge base."""
+        self._refresh()
+        if self._city_names is None:
+            self._city_names = self._source.city_names()
+        return list(self._city_names)
+
+
+_stores = {}
+
+
+def get_review_store(json_file: str) -> ReviewStore:
+    """Return the process-wide store for a knowledge base file."""
+    path = os.path.abspath(json_file)
+    store = _stores.get(path)
+    if store is None:
+        store = _stores.setdefault(path, ReviewStore(path))
+    return store
+
+
+# ---------------------------------------------------------------
+# Conversion
+# ---------------------------------------------------------------
+
+def convert(source_path: str, target_path: str):
+    """Rewrite a knowledge base as JSONL or SQLite, picked by the target extension."""
+    hotels = open_source(source_path).iter_hotels()
+    extension = os.path.splitext(target_path)[1].lower()
+
+    if extension in JSONL_EXTENSIONS:
+        with open(target_path, "w", encoding="utf-8") as file:
+            for city_name, hotel in hotels:
+                file.write(json.dumps({"city": city_name, **hotel}, ensure_ascii=False) + "\n")
+    elif extension in SQLITE_EXTENSIONS:
+        conn = sqlite3.connect(target_path)
+        try:
+            with conn:
+                conn.execute("DROP TABLE IF EXISTS hotels")
+                conn.execute("CREATE TABLE hotels (city_key TEXT NOT NULL, hotel_key TEXT NOT NULL, city TEXT NOT NULL, "
+                             "hotel_id TEXT, hotel_name TEXT NOT NULL, reviews TEXT NOT NULL, PRIMARY KEY (city_key, hotel_key))")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO hotels VALUES (?, ?, ?, ?, ?, ?)",
+                    ((fold_city(city_name), _fold(hotel["hotel_name"]), city_name, hotel.get("hotel_id"), hotel["hotel_name"],
+                      json.dumps(hotel.get("reviews", []), ensure_ascii=False)) for city_name, hotel in hotels)
+                )
+        finally:
+            conn.close()
+    else:
+        raise ValueError(f"Unsupported target format: {target_path}")
+
+
+if __name__ == "__main__":
+    # python review_store.py knowledge_base/hotel_reviews.json knowledge_base/hotel_reviews.jsonl
+    convert(sys.argv[1], sys.argv[2])
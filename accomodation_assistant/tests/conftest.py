@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# The assistant modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modules read their settings at import time, keep their state files out of the working tree
+_state_dir = tempfile.mkdtemp(prefix="assistant_tests_")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("COMPLETION_CACHE", "false")
+os.environ.setdefault("GEOCODE_CACHE_PATH", os.path.join(_state_dir, "geocode_cache.json"))
+os.environ.setdefault("HOTELS_LAST_GOOD_PATH", os.path.join(_state_dir, "hotels_last_good.json"))
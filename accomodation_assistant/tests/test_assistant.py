@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+
+import assistant
+
+DIGEST = {
+    "review_count": 2, "rating_mean": 4.0, "recency_weighted_rating": 4.2, "latest_review": "2025-01-02",
+    "rating_distribution": {"5": 1, "3": 1}, "aspects": {}, "quotes": [],
+}
+REVIEWS = [{"date": "2025-01-01", "comment": "Great pool"}, {"date": "2025-01-02", "comment": "Slow check-in"}]
+
+
+class FakeDigestStore:
+    def __init__(self, digest):
+        self.digest = digest
+
+    def get_digest(self, city_name, hotel_name):
+        return self.digest
+
+
+class FakeReviewIndex:
+    def search(self, city_name, hotel_name, query, k):
+        return REVIEWS[:k]
+
+
+def use_digests(monkeypatch, digest, top_k=0):
+    monkeypatch.setattr(assistant, "REVIEW_DIGESTS", True)
+    monkeypatch.setattr(assistant, "REVIEW_TOP_K", top_k)
+    monkeypatch.setattr(assistant, "get_digest_store", lambda path: FakeDigestStore(digest))
+    monkeypatch.setattr(assistant, "get_reviews_by_city_and_hotel", lambda path, city, hotel: REVIEWS)
+    monkeypatch.setattr("review_index.get_review_index", lambda path: FakeReviewIndex())
+
+
+def test_hotel_without_digest_falls_back_to_its_reviews(monkeypatch):
+    use_digests(monkeypatch, None)
+
+    text = assistant.format_hotel_reviews("reviews.json", "Bengaluru", "Hotel A")
+
+    assert "Review 0 (posted on 2025-01-01): Great pool" in text
+    assert text.endswith("\n" + "-" * 50)
+
+
+def test_hotel_without_digest_keeps_its_relevant_reviews(monkeypatch):
+    use_digests(monkeypatch, None, top_k=1)
+
+    text = assistant.format_hotel_reviews("reviews.json", "Bengaluru", "Hotel A", query="pool")
+
+    assert text == "\nHotel name: Hotel A\nRelevant review 0 (posted on 2025-01-01): Great pool\n" + "-" * 50
+
+
+def test_relevant_reviews_follow_the_digest_before_the_separator(monkeypatch):
+    use_digests(monkeypatch, DIGEST, top_k=1)
+
+    text = assistant.format_hotel_reviews("reviews.json", "Bengaluru", "Hotel A", query="pool")
+
+    assert text.count("-" * 50) == 1
+    assert text.startswith("\nHotel name: Hotel A\nReviews: 2")
+    assert text.endswith("Relevant review 0 (posted on 2025-01-01): Great pool\n" + "-" * 50)
+
+
+def test_digest_replaces_plain_reviews(monkeypatch):
+    use_digests(monkeypatch, DIGEST)
+
+    text = assistant.format_hotel_reviews("reviews.json", "Bengaluru", "Hotel A")
+
+    assert "Great pool" not in text
+    assert text.endswith("Aspects: none mentioned\n" + "-" * 50)
+
+
+def test_runs_close_the_http_client_they_opened():
+    async def run():
+        return assistant.get_http_client()
+
+    client = asyncio.run(assistant.closing_http_client(run()))
+
+    assert client.is_closed
+    assert assistant.http_client is None
+
+
+def test_a_client_passed_in_is_used_and_left_open():
+    async def run():
+        owned = assistant.get_http_client()
+        shared = httpx.AsyncClient()
+        await assistant.use_http_client(shared)
+        used = assistant.get_http_client()
+        await assistant.close_http_client()
+        return owned, shared, used
+
+    owned, shared, used = asyncio.run(run())
+
+    assert owned.is_closed
+    assert used is shared and not shared.is_closed
@@ -0,0 +1,81 @@
+import asyncio
+import io
+import json
+import sys
+import time
+
+from batch_runner import TokenBucket, completed_ids, open_prompts, read_prompts, run_batch
+
+
+def read_output(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_rerun_retries_failed_prompts_and_skips_successful_ones(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    prompts = [("1", "hotel in Bengaluru"), ("2", "hotel in Coimbatore"), ("3", "hotel in Ooty")]
+    attempts = []
+
+    async def flaky(prompt):
+        attempts.append(prompt)
+        if prompt.endswith("Coimbatore") and attempts.count(prompt) == 1:
+            raise RuntimeError("rate limited")
+        return {"prompt": prompt}
+
+    first = asyncio.run(run_batch(flaky, prompts, output, concurrency=2))
+    assert first == {"ok": 2, "failed": 1, "skipped": 0}
+    assert completed_ids(output) == {"1", "3"}
+
+    second = asyncio.run(run_batch(flaky, prompts, output, concurrency=2))
+    assert second == {"ok": 1, "failed": 0, "skipped": 2}
+    assert completed_ids(output) == {"1", "2", "3"}
+
+    records = read_output(output)
+    assert [record["id"] for record in records if record["id"] == "2"] == ["2", "2"]
+    assert records[-1]["id"] == "2" and records[-1]["error"] is None
+
+
+def test_partially_written_last_line_is_ignored(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"id": "1", "result": {}, "error": null}\n{"id": "2", "res', encoding="utf-8")
+
+    assert completed_ids(str(output)) == {"1"}
+
+
+def test_read_prompts_accepts_plain_lines_and_json_records():
+    lines = ['hotel in Bengaluru\n', '\n', '{"id": "x", "prompt": "hotel in Ooty"}\n']
+
+    assert list(read_prompts(lines)) == [("1", "hotel in Bengaluru"), ("x", "hotel in Ooty")]
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)
+
+    async def take_twice():
+        started = time.monotonic()
+        await bucket.acquire(60)
+        await bucket.acquire(0.05)
+        return time.monotonic() - started
+
+    assert asyncio.run(take_twice()) >= 0.04
+
+
+def test_stdin_is_left_open_after_the_batch(monkeypatch):
+    stdin = io.StringIO("hotel in Ooty\n")
+    monkeypatch.setattr(sys, "stdin", stdin)
+
+    with open_prompts("-") as prompts:
+        assert list(read_prompts(prompts)) == [("1", "hotel in Ooty")]
+
+    assert not stdin.closed
+
+
+def test_prompt_files_are_closed_after_the_batch(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text('{"id": "a", "prompt": "hotel in Ooty"}\n', encoding="utf-8")
+
+    with open_prompts(str(path)) as prompts:
+        assert list(read_prompts(prompts)) == [("a", "hotel in Ooty")]
+
+    assert prompts.closed
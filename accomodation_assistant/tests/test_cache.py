@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel, ValidationError
+
+import assistant
+from cache import CompletionCache, TTLCache, stream_chat_completion
+
+REQUEST = {"model": "test-model", "messages": [{"role": "user", "content": "hotel in Bengaluru"}],
+           "response_format": {"type": "json_object"}}
+
+
+class Answer(BaseModel):
+    city: str
+
+
+def completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "completion", "object": "chat.completion", "created": 0, "model": "test-model",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+class FakeClient:
+    """Answers chat completions with the given contents in turn."""
+
+    def __init__(self, *contents):
+        self.contents = list(contents)
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **request):
+        self.calls += 1
+        return completion(self.contents.pop(0))
+
+
+def validate_answer(result):
+    return Answer.model_validate_json(result.choices[0].message.content)
+
+
+@pytest.fixture
+def completion_cache(tmp_path):
+    return CompletionCache(str(tmp_path / "completions.sqlite3"))
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=-1)
+    assert cache.get("b") is None
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    cache.set("d", 4)
+    assert cache.get("c") is None, "least recently used entry is evicted"
+    assert (cache.get("a"), cache.get("d")) == (1, 4)
+
+
+def test_valid_completion_is_served_from_cache(completion_cache):
+    client = FakeClient('{"city": "Bengaluru"}')
+
+    async def run():
+        first = await completion_cache.create(client, "extraction", validate=validate_answer, **REQUEST)
+        second = await completion_cache.create(client, "extraction", validate=validate_answer, **REQUEST)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert client.calls == 1
+    assert second.choices[0].message.content == first.choices[0].message.content
+    assert completion_cache.stats() == {"extraction": {"hits": 1, "misses": 1}}
+
+
+def test_invalid_completion_is_not_cached(completion_cache):
+    client = FakeClient('{"town": "Bengaluru"', '{"city": "Bengaluru"}')
+
+    async def run():
+        with pytest.raises(ValidationError):
+            await completion_cache.create(client, "extraction", validate=validate_answer, **REQUEST)
+        return await completion_cache.create(client, "extraction", validate=validate_answer, **REQUEST)
+
+    result = asyncio.run(run())
+    assert client.calls == 2
+    assert validate_answer(result).city == "Bengaluru"
+
+
+def test_cached_completion_that_no_longer_validates_is_requested_again(completion_cache):
+    client = FakeClient('{"town": "Bengaluru"}', '{"city": "Bengaluru"}')
+
+    async def run():
+        await completion_cache.create(client, "extraction", **REQUEST)
+        return await completion_cache.create(client, "extraction", validate=validate_answer, **REQUEST)
+
+    result = asyncio.run(run())
+    assert client.calls == 2
+    assert validate_answer(result).city == "Bengaluru"
+    assert completion_cache.get(completion_cache.key(**REQUEST)) is not None
+
+
+def test_create_completion_parses_and_skips_caching_invalid_answers(monkeypatch, completion_cache):
+    client = FakeClient("not json", '{"city": "Bengaluru"}')
+    monkeypatch.setattr(assistant, "completion_cache", completion_cache)
+    monkeypatch.setattr(assistant, "get_client", lambda: client)
+
+    async def run():
+        with pytest.raises(ValidationError):
+            await assistant.create_completion("extract_stay_details", parse=assistant.parse_content(Answer), **REQUEST)
+        return await assistant.create_completion("extract_stay_details", parse=assistant.parse_content(Answer), **REQUEST)
+
+    assert asyncio.run(run()) == Answer(city="Bengaluru")
+    assert client.calls == 2
+
+
+def test_streamed_completion_asks_for_and_keeps_token_usage():
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        chunks = [
+            {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "test-model",
+             "choices": [{"index": 0, "delta": {"content": "Hello"}, "finish_reason": "stop"}]},
+            {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "test-model", "choices": [],
+             "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}},
+        ]
+        body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = AsyncOpenAI(api_key="test", base_url="http://llm.test/v1", http_client=http_client)
+            return await stream_chat_completion(client, deltas.append, **REQUEST)
+
+    deltas = []
+    result = asyncio.run(run())
+
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert deltas == ["Hello"]
+    assert result.choices[0].message.content == "Hello"
+    assert result.usage.total_tokens == 15
@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+
+from fast_path import FastPathParser
+
+TODAY = date(2026, 3, 1)
+
+
+@pytest.fixture
+def parser():
+    return FastPathParser(["Bengaluru", "Ooty"])
+
+
+@pytest.mark.parametrize("prompt, start_date, end_date", [
+    ("hotel in Ooty from 5 May to 7 May", "2026-05-05", "2026-05-07"),
+    ("hotel in Ooty from Sept 5 to Sep 8", "2026-09-05", "2026-09-08"),
+    ("hotel in Ooty from 3rd Dec. 2026 to December 6th, 2026", "2026-12-03", "2026-12-06"),
+])
+def test_month_names_and_abbreviations_are_dates(parser, prompt, start_date, end_date):
+    assert parser.parse(prompt, today=TODAY) == {"city": "Ooty", "start_date": start_date, "end_date": end_date}
+
+
+@pytest.mark.parametrize("prompt", [
+    "3 decent hotels in Bengaluru from 2026-04-01 to 2026-04-03",
+    "hotel near the mayor 2 office in Bengaluru from 2026-04-01 to 2026-04-03",
+    "hotel in Bengaluru for 2 marchers from 2026-04-01 to 2026-04-03",
+])
+def test_words_starting_like_a_month_are_not_dates(parser, prompt):
+    assert parser.parse(prompt, today=TODAY) == {"city": "Bengaluru", "start_date": "2026-04-01", "end_date": "2026-04-03"}
+
+
+@pytest.mark.parametrize("prompt, start_date, end_date", [
+    ("hotel in Bengaluru from Nov 1 to Nov 3, 2027", "2027-11-01", "2027-11-03"),
+    ("hotel in Bengaluru from 30 Dec 2026 to 2 Jan", "2026-12-30", "2027-01-02"),
+    ("hotel in Bengaluru from Dec 30 to Jan 2, 2027", "2026-12-30", "2027-01-02"),
+    ("hotel in Bengaluru from Feb 27 to Mar 2", "2026-02-27", "2026-03-02"),
+])
+def test_a_missing_year_comes_from_the_other_date(parser, prompt, start_date, end_date):
+    assert parser.parse(prompt, today=date(2026, 2, 1)) == {"city": "Bengaluru", "start_date": start_date, "end_date": end_date}
+
+
+def test_overlapping_date_matches_count_once(parser):
+    # "November 2" overlaps "1 November" and is no check-out date
+    assert parser.parse("hotel in Ooty on 1 November 2 nights", today=TODAY) is None
+    assert parser.parse("hotel in Ooty on 1 November for 2 nights", today=TODAY) == {
+        "city": "Ooty", "start_date": "2026-11-01", "end_date": "2026-11-03"}
+
+
+def test_stays_beyond_the_forecast_horizon_are_left_to_the_llm(parser):
+    assert parser.parse("hotel in Ooty from Nov 1 to Nov 30", today=TODAY) is None
+    assert parser.parse("hotel in Ooty from Nov 1 for three weeks", today=TODAY) is None
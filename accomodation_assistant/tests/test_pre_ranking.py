@@ -0,0 +1,103 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+import assistant
+from pre_ranking import explain_ranking, pre_rank, safety_score
+
+TODAY = date(2025, 6, 1)
+
+
+def digest(rating_mean, recency_weighted_rating=None, latest_review="2025-05-01"):
+    return {
+        "review_count": 2, "rating_mean": rating_mean,
+        "recency_weighted_rating": recency_weighted_rating or rating_mean, "latest_review": latest_review,
+        "rating_distribution": {"5": 1, "4": 1}, "aspects": {}, "quotes": [],
+    }
+
+
+def candidate(name, comments, rating_mean, sentiment=None):
+    return {
+        "hotel_name": name,
+        "reviews": [{"date": "2025-05-01", "rating": 4, "comment": comment} for comment in comments],
+        "digest": digest(rating_mean),
+        "sentiment": sentiment,
+    }
+
+
+def test_safety_reports_outweigh_a_slightly_better_rating():
+    ranked = pre_rank([
+        candidate("Unsafe", ["Bags were stolen from the room", "Felt unsafe at night"], 4.4),
+        candidate("Safe", ["Very safe area", "Secure parking"], 4.2),
+    ], TODAY)
+
+    assert [hotel["hotel_name"] for hotel in ranked] == ["Safe", "Unsafe"]
+    assert ranked[0]["score"] > ranked[1]["score"]
+
+
+@pytest.mark.parametrize("comment", [
+    "The area did not feel safe at night",
+    "Not safe for solo women",
+    "Didn't feel safe walking back after dark",
+])
+def test_negated_safety_praise_is_a_negative_report(comment):
+    assert safety_score([{"comment": comment}], digest(4.0)) == 0
+
+
+def test_negated_safety_reports_do_not_rank_first():
+    ranked = pre_rank([
+        candidate("Negated", ["The area did not feel safe at night", "Not safe for solo women"], 4.6),
+        candidate("Safe", ["Very safe area", "Secure parking"], 4.2),
+    ], TODAY)
+
+    assert [hotel["hotel_name"] for hotel in ranked] == ["Safe", "Negated"]
+    assert ranked[1]["signals"]["safety"] == 0
+
+
+def test_missing_sentiment_does_not_count_against_a_hotel():
+    without, = pre_rank([candidate("A", ["Nice"], 4.0)], TODAY)
+    neutral, = pre_rank([candidate("A", ["Nice"], 4.0, {"overallRating": 80})], TODAY)
+
+    assert without["signals"]["sentiment"] is None
+    assert without["score"] == neutral["score"]
+
+
+def test_explain_ranking_without_llm():
+    ranked = pre_rank([candidate("A", ["Very safe area"], 4.0)], TODAY)
+
+    explanation = explain_ranking(ranked[0])
+
+    assert explanation["hotel_name"] == "A"
+    assert explanation["reason"].startswith(f"Score {ranked[0]['score']:.2f}")
+
+
+class FakeDigestStore:
+    def get_digest(self, city_name, hotel_name):
+        return digest(4.0)
+
+
+@pytest.mark.parametrize("mode, shortlist, hotels, fetched", [
+    ("llm", 6, 3, False),
+    ("llm", 0, 8, False),
+    ("llm", 2, 3, True),
+    ("algorithmic", 6, 3, True),
+])
+def test_sentiments_are_fetched_only_when_they_change_the_result(monkeypatch, mode, shortlist, hotels, fetched):
+    requested = []
+
+    async def get_hotel_sentiments(hotel_ids):
+        requested.append(hotel_ids)
+        return {}
+
+    monkeypatch.setattr(assistant, "RANKING_MODE", mode)
+    monkeypatch.setattr(assistant, "PRE_RANK_SHORTLIST", shortlist)
+    monkeypatch.setattr(assistant, "get_digest_store", lambda path: FakeDigestStore())
+    monkeypatch.setattr(assistant, "get_reviews_by_city_and_hotel", lambda path, city, hotel: [])
+    monkeypatch.setattr(assistant, "get_hotel_sentiments", get_hotel_sentiments)
+
+    hotel_list = [{"name": f"Hotel {i}", "hotelId": f"H{i}"} for i in range(hotels)]
+    shortlisted = asyncio.run(assistant.shortlist_hotels("Bengaluru", "reviews.json", hotel_list))
+
+    assert bool(requested) == fetched
+    assert len(shortlisted) == min(hotels, shortlist or hotels)
@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, UpstreamUnavailable, request_with_retries
+
+URL = "http://hotels.test/hotels"
+
+
+def half_open_breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    monkeypatch.setattr(resilience, "get_breaker", lambda url: breaker)
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def client_for(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_breaker_opens_after_consecutive_failures_and_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    assert not breaker.allow(), "only one trial call while half-open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_cancelled_trial_call_releases_the_half_open_breaker(monkeypatch):
+    breaker = half_open_breaker(monkeypatch)
+
+    async def hang(request):
+        await asyncio.Event().wait()
+
+    async def run():
+        async with client_for(hang) as client:
+            task = asyncio.create_task(request_with_retries(client, "GET", URL, retries=0))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(run())
+    assert breaker.failures == 1, "a cancellation is not a failure of the upstream"
+    assert breaker.allow()
+
+
+def test_unexpected_error_in_trial_call_counts_as_failure(monkeypatch):
+    breaker = half_open_breaker(monkeypatch)
+
+    def broken(request):
+        raise ValueError("bad response")
+
+    async def run():
+        async with client_for(broken) as client:
+            with pytest.raises(ValueError):
+                await request_with_retries(client, "GET", URL, retries=0)
+
+    asyncio.run(run())
+    assert breaker.failures == 2
+    assert breaker.allow()
+
+
+def test_retries_give_up_with_upstream_unavailable(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(resilience, "get_breaker", lambda url: CircuitBreaker(failure_threshold=10))
+    calls = []
+
+    def unavailable(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async def run():
+        async with client_for(unavailable) as client:
+            with pytest.raises(UpstreamUnavailable):
+                await request_with_retries(client, "GET", URL, retries=2)
+
+    asyncio.run(run())
+    assert len(calls) == 3
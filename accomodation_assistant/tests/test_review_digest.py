@@ -0,0 +1,96 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from review_digest import DigestStore, build_digest
+from review_store import ReviewStore
+
+REVIEWS = [
+    {"date": "2025-01-01", "rating": 5, "comment": "Very safe area and friendly staff"},
+    {"date": "2025-02-01", "rating": 3, "comment": "Room was clean but the street was noisy"},
+]
+
+
+def write_knowledge_base(tmp_path):
+    path = tmp_path / "reviews.json"
+    path.write_text(json.dumps({"cities": [{"city": "Bengaluru", "hotels": [
+        {"hotel_name": "Hotel A", "reviews": REVIEWS}
+    ]}]}), encoding="utf-8")
+    return str(path)
+
+
+def test_review_store_resolves_city_aliases(tmp_path):
+    store = ReviewStore(write_knowledge_base(tmp_path))
+
+    assert store.get_reviews("Bangalore", "hotel a") == REVIEWS
+    assert store.hotel_names(" bangalore ") == ["Hotel A"]
+
+
+def test_digest_lookup_resolves_city_aliases(tmp_path):
+    store = DigestStore(write_knowledge_base(tmp_path), digest_file=str(tmp_path / "digests.json"), cache_file="")
+
+    digest = store.get_digest("Bangalore", "Hotel A")
+
+    assert digest is not None
+    assert digest == store.get_digest("Bengaluru", "HOTEL A")
+    assert digest["review_count"] == 2
+
+
+def test_old_digest_files_are_reused_while_the_reviews_are_unchanged(tmp_path):
+    json_file = write_knowledge_base(tmp_path)
+    digest_file = tmp_path / "digests.json"
+    DigestStore(json_file, digest_file=str(digest_file), cache_file="").update(
+        today=date.today() - timedelta(days=365), save_to=str(digest_file))
+
+    store = DigestStore(json_file, digest_file=str(digest_file), cache_file="")
+
+    assert store.update() == 0
+    assert store.get_digest("Bengaluru", "Hotel A") == build_digest(REVIEWS, date.today() - timedelta(days=365))
+
+
+def test_recency_weighted_rating_does_not_depend_on_the_current_date():
+    assert (build_digest(REVIEWS, date(2025, 3, 1))["recency_weighted_rating"]
+            == build_digest(REVIEWS, date(2027, 3, 1))["recency_weighted_rating"]
+            == round((5 * 0.5 ** (31 / 180) + 3) / (0.5 ** (31 / 180) + 1), 2))
+
+
+def test_runtime_updates_leave_the_digest_file_alone(tmp_path):
+    json_file = write_knowledge_base(tmp_path)
+    digest_file = tmp_path / "digests.json"
+    DigestStore(json_file, digest_file=str(digest_file), cache_file="").update(save_to=str(digest_file))
+    built = digest_file.read_text(encoding="utf-8")
+
+    # Changed reviews are recomputed in memory only
+    with open(json_file, "w", encoding="utf-8") as file:
+        json.dump({"cities": [{"city": "Bengaluru", "hotels": [{"hotel_name": "Hotel A", "reviews": REVIEWS[:1]}]}]}, file)
+    store = DigestStore(json_file, digest_file=str(digest_file), cache_file="")
+    assert store.update() == 1
+    assert digest_file.read_text(encoding="utf-8") == built
+
+    cache_file = tmp_path / "cache" / "digests.json"
+    cache_file.parent.mkdir()
+    store = DigestStore(json_file, digest_file=str(digest_file), cache_file=str(cache_file))
+    assert store.update() == 1
+    assert digest_file.read_text(encoding="utf-8") == built
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["hotels"]
+
+    # The saved runtime digests are picked up instead of recomputing again
+    store = DigestStore(json_file, digest_file=str(digest_file), cache_file=str(cache_file))
+    assert store.update() == 0
+
+
+def test_lookups_only_read_the_requested_city(tmp_path, monkeypatch):
+    path = tmp_path / "reviews.jsonl"
+    path.write_text("\n".join(json.dumps({"city": city, "hotel_name": "Hotel A", "reviews": REVIEWS})
+                              for city in ("Bengaluru", "Ooty", "Coimbatore")), encoding="utf-8")
+    store = DigestStore(str(path), digest_file=str(tmp_path / "digests.json"), cache_file="")
+    read = []
+    city_items = store.review_store.city_items
+    monkeypatch.setattr(store.review_store, "items", lambda: pytest.fail("the whole knowledge base was read"))
+    monkeypatch.setattr(store.review_store, "city_items", lambda city: read.append(city) or city_items(city))
+
+    assert store.get_digest("Bangalore", "Hotel A")["review_count"] == 2
+    assert store.get_digest("Bengaluru", "Hotel A") is not None
+    assert store.get_digest("Ooty", "Hotel B") is None
+    assert read == ["Bangalore", "Ooty"]
@@ -0,0 +1,99 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from review_index import HashingEmbedder, ReviewIndex, city_dir_name
+
+POOL = {"date": "2025-01-01", "rating": 5, "comment": "The rooftop pool was great"}
+BREAKFAST = {"date": "2025-01-02", "rating": 2, "comment": "Breakfast was cold and late"}
+NOISE = {"date": "2025-01-03", "rating": 3, "comment": "Noisy street outside at night"}
+
+
+def write_reviews(path, hotels, mtime_ns):
+    document = {"cities": [{"city": "Bengaluru", "hotels": [
+        {"hotel_name": name, "reviews": reviews} for name, reviews in hotels
+    ]}]}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file)
+    # The store reloads on a changed modification time, set it explicitly so fast rewrites are seen
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def build_index(tmp_path, hotels, mtime_ns):
+    path = str(tmp_path / "reviews.json")
+    write_reviews(path, hotels, mtime_ns)
+    index = ReviewIndex(path, index_dir=str(tmp_path / "index"), embedder=HashingEmbedder())
+    index.build()
+    return index
+
+
+def test_search_finds_the_matching_review(tmp_path):
+    index = build_index(tmp_path, [("Hotel A", [POOL, BREAKFAST]), ("Hotel B", [NOISE])], 1)
+
+    assert index.search("Bengaluru", "Hotel A", "pool", k=1) == [POOL]
+    assert index.search("bengaluru ", "hotel a", "breakfast", k=1) == [BREAKFAST]
+
+
+def test_reordered_reviews_are_not_matched_to_stale_vectors(tmp_path):
+    build_index(tmp_path, [("Hotel A", [POOL, BREAKFAST]), ("Hotel B", [NOISE])], 1)
+
+    index = build_index(tmp_path, [("Hotel B", [NOISE]), ("Hotel A", [BREAKFAST, POOL])], 2)
+
+    assert index.build() == 0
+    assert index.search("Bengaluru", "Hotel A", "pool", k=1) == [POOL]
+    assert index.search("Bengaluru", "Hotel A", "breakfast", k=1) == [BREAKFAST]
+    assert index.search("Bengaluru", "Hotel B", "noisy street", k=1) == [NOISE]
+
+
+def test_removed_and_duplicated_reviews_are_not_matched_to_stale_vectors(tmp_path):
+    build_index(tmp_path, [("Hotel A", [POOL, BREAKFAST]), ("Hotel B", [NOISE])], 1)
+
+    # Same row count and no new text, but the rows no longer line up with the stored vectors
+    index = build_index(tmp_path, [("Hotel A", [BREAKFAST, BREAKFAST]), ("Hotel B", [NOISE])], 2)
+
+    expected = index.embedder.embed([BREAKFAST["comment"], BREAKFAST["comment"], NOISE["comment"]])
+    assert np.allclose(np.asarray(index._cities["bengaluru"]["vectors"]), expected)
+
+
+def test_search_only_reads_and_stores_the_requested_city(tmp_path, monkeypatch):
+    path = tmp_path / "reviews.jsonl"
+    path.write_text("\n".join(json.dumps({"city": city, "hotel_name": "Hotel A", "reviews": [POOL, BREAKFAST]})
+                              for city in ("Bengaluru", "Ooty")), encoding="utf-8")
+    index = ReviewIndex(str(path), index_dir=str(tmp_path / "index"), embedder=HashingEmbedder())
+    monkeypatch.setattr(index.review_store, "items", lambda: pytest.fail("the whole knowledge base was read"))
+
+    assert index.search("Ooty", "Hotel A", "pool", k=1) == [POOL]
+    assert list(index._cities) == ["ooty"]
+    assert os.listdir(tmp_path / "index") == [city_dir_name("ooty")]
+
+    # A new process loads the stored vectors instead of embedding again
+    index = ReviewIndex(str(path), index_dir=str(tmp_path / "index"), embedder=HashingEmbedder())
+    assert index.build("Ooty") == 0
+
+
+def test_rebuild_swaps_vectors_and_rows_together(tmp_path):
+    index = build_index(tmp_path, [("Hotel A", [POOL, BREAKFAST])], 1)
+    city_dir = tmp_path / "index" / city_dir_name("bengaluru")
+    old_rows, _ = index._read("bengaluru")
+
+    index = build_index(tmp_path, [("Hotel A", [NOISE, POOL, BREAKFAST])], 2)
+
+    # One vectors file, named by the rows meta.json lists, and no temporary files left behind
+    meta = json.loads((city_dir / "meta.json").read_text(encoding="utf-8"))
+    assert sorted(path.name for path in city_dir.iterdir()) == sorted(["meta.json", meta["vectors"]])
+    rows, vectors = index._read("bengaluru")
+    assert len(rows) == len(vectors) == 3 != len(old_rows)
+
+
+def test_metadata_without_its_vectors_is_rebuilt(tmp_path):
+    build_index(tmp_path, [("Hotel A", [POOL, BREAKFAST])], 1)
+    city_dir = tmp_path / "index" / city_dir_name("bengaluru")
+    meta = json.loads((city_dir / "meta.json").read_text(encoding="utf-8"))
+    (city_dir / meta["vectors"]).unlink()
+
+    index = ReviewIndex(str(tmp_path / "reviews.json"), index_dir=str(tmp_path / "index"), embedder=HashingEmbedder())
+
+    assert index.build() == 2
+    assert index.search("Bengaluru", "Hotel A", "pool", k=1) == [POOL]
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import uuid
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Finished traces are appended here as JSON lines when set
+TRACE_PATH = os.environ.get("ASSISTANT_TRACE_PATH", "")
+RECENT_TRACES = int(os.environ.get("ASSISTANT_RECENT_TRACES", "100"))
+
+
+# ---------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------
+
+class Span:
+    """
+    One timed stage of a request. Counters such as prompt_tokens,
+    completion_tokens, cache_hits and retries go into `attributes`.
+    """
+
+    def __init__(self, name: str, parent=None, attributes: dict = None):
+        self.name = name
+        self.parent = parent
+        self.root = parent.root if parent is not None else self
+        self.trace_id = self.root.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.duration = None
+        self.spans = [] if parent is None else None
+
+    def add(self, key: str, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": dict(self.attributes),
+        }
+
+
+_current_span = contextvars.ContextVar("assistant_current_span", default=None)
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the enclosed block as a child of the current span, or as the root of
+    a new trace. Tasks created inside the block inherit it as their parent.
+    """
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.set("error", type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # An async generator closed from another context, the context is gone anyway
+            pass
+        _finish(current)
+
+
+def traced(name: str):
+    """Decorator running an async function or async generator inside span(name)."""
+    def decorator(fn):
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(name):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+        else:
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add(key: str, amount=1):
+    """Increment a counter on the current span, a no-op outside of any span."""
+    current = _current_span.get()
+    if current is not None:
+        current.add(key, amount)
+
+
+def record_usage(usage):
+    """Add the token counts of an OpenAI `usage` object to the current span."""
+    if usage is None:
+        return
+    add("prompt_tokens", usage.prompt_tokens or 0)
+    add("completion_tokens", usage.completion_tokens or 0)
+
+
+# ---------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------
+
+_recent_traces = deque(maxlen=RECENT_TRACES)
+_export_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _prometheus_metrics():
+    """Prometheus metrics, created on the first finished span to keep prometheus_client out of the import."""
+    try:
+        from prometheus_client import Counter, Histogram
+    except ImportError:
+        return None
+    return {
+        "stage_seconds": Histogram(
+            "assistant_stage_duration_seconds", "Wall time of assistant pipeline stages", ["stage"],
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+        ),
+        "llm_tokens": Counter("assistant_llm_tokens", "LLM tokens used by assistant pipeline stages", ["stage", "kind"]),
+        "cache_hits": Counter("assistant_cache_hits", "Cache hits in assistant pipeline stages", ["stage"]),
+        "retries": Counter("assistant_retries", "Upstream retries in assistant pipeline stages", ["stage"]),
+    }
+
+
+def _observe(metrics: dict, finished: Span):
+    metrics["stage_seconds"].labels(finished.name).observe(finished.duration)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if finished.attributes.get(kind):
+            metrics["llm_tokens"].labels(finished.name, kind.split("_")[0]).inc(finished.attributes[kind])
+    for key in ("cache_hits", "retries"):
+        if finished.attributes.get(key):
+            metrics[key].labels(finished.name).inc(finished.attributes[key])
+
+
+def _finish(finished: Span):
+    metrics = _prometheus_metrics()
+    if metrics is not None:
+        _observe(metrics, finished)
+
+    if finished.parent is not None:
+        finished.root.spans.append(finished)
+        return
+
+    trace = finished.to_dict()
+    trace["spans"] = [child.to_dict() for child in finished.spans]
+    for key in ("prompt_tokens", "completion_tokens", "cache_hits", "retries"):
+        trace["attributes"][key] = finished.attributes.get(key, 0) + sum(child.attributes.get(key, 0) for child in finished.spans)
+    _recent_traces.append(trace)
+
+    logger.info("Trace %s: %s", finished.name, ", ".join(
+        f"{child['name']} {child['duration_ms']:.0f}ms" for child in sorted(trace["spans"], key=lambda s: s["start_time"])
+    ))
+
+    if TRACE_PATH:
+        with _export_lock:
+            with open(TRACE_PATH, "a", encoding="utf-8") as file:
+                file.write(json.dumps(trace, default=str) + "\n")
+
+
+def recent_traces():
+    """Finished traces, oldest first, as JSON-serialisable dicts."""
+    return list(_recent_traces)
@@ -0,0 +1,95 @@
+"""
+Load test of the hotels API endpoints against local fake upstreams.
+
+The FastAPI app runs in this process behind httpx.ASGITransport so that
+tracemalloc sees its allocations; only the upstreams are real HTTP servers.
+
+    python -m benchmarks.bench_api --requests 500 --concurrency 50 --latency-ms 50
+"""
+import os
+import sys
+import asyncio
+import argparse
+
+import httpx
+
+from benchmarks.harness import REPO_DIR, FakeUpstreams, run_scenario, write_results
+
+SCENARIOS = ["hotels_search_cached", "hotels_search_uncached", "city_iata", "hotel_by_id", "hotels_batch", "reviews_batch"]
+
+
+def load_app(upstream_url: str):
+    # app.config reads the environment at import time
+    os.environ.update({
+        "TOKEN_URL": f"{upstream_url}/v1/security/oauth2/token",
+        "BASE_URL": f"{upstream_url}/v1/reference-data/locations",
+        "REVIEW_URL": f"{upstream_url}/v2",
+        "CLIENT_ID": "benchmark",
+        "CLIENT_SECRET": "benchmark",
+    })
+    sys.path.insert(0, os.path.join(REPO_DIR, "python_fastapi_hotels"))
+    from app.main import app
+    from app.controller import locationController
+    return app, locationController
+
+
+def scenario_calls(client: httpx.AsyncClient, cities: int, batch_size: int):
+    async def get(url, **params):
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+
+    async def post(url, json):
+        response = await client.post(url, json=json)
+        response.raise_for_status()
+
+    return {
+        # A fixed set of cities, so all but the first request per city hit the cache
+        "hotels_search_cached": lambda i: get("/hotels", city=f"City{i % cities}", ratings="5,4,3"),
+        # Every request names a new city and goes to the upstream
+        "hotels_search_uncached": lambda i: get("/hotels", city=f"Uncached{i}", ratings="5,4,3"),
+        "city_iata": lambda i: get(f"/hotels/city/City{i % cities}"),
+        "hotel_by_id": lambda i: get(f"/hotels/id/H{i:07d}"),
+        "hotels_batch": lambda i: post("/hotels/batch", {"hotel_ids": [f"B{i:05d}{j:03d}" for j in range(batch_size)]}),
+        "reviews_batch": lambda i: post("/hotels/reviews/batch", {"hotel_ids": [f"R{i:05d}{j:03d}" for j in range(min(batch_size, 9))]}),
+    }
+
+
+async def run(args):
+    with FakeUpstreams(latency_ms=args.latency_ms, jitter=args.jitter, hotels_per_city=args.hotels_per_city) as upstreams:
+        app, locationController = load_app(upstreams.url)
+
+        def reset():
+            locationController.iata_cache.clear()
+            locationController.hotels_cache.clear()
+
+        results = {}
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://hotels-api", timeout=60) as client:
+                calls = scenario_calls(client, args.cities, args.batch_size)
+                for name in args.scenarios:
+                    results[name] = await run_scenario(name, calls[name], args.requests, args.concurrency,
+                                                       warmup=args.warmup, alloc_requests=args.alloc_requests, reset=reset)
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results("api", params, results, args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests before each scenario")
+    parser.add_argument("--alloc-requests", type=int, default=100, help="Requests run under tracemalloc, 0 to skip")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Fake upstream latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fake upstream latency jitter fraction")
+    parser.add_argument("--hotels-per-city", type=int, default=50, help="Hotels in every by-city response")
+    parser.add_argument("--cities", type=int, default=20, help="Distinct cities in the cached scenarios")
+    parser.add_argument("--batch-size", type=int, default=50, help="Hotel ids per batch request")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--output", help="Result file, defaults to benchmarks/results/api-<time>-<commit>.json")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
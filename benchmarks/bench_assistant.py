@@ -0,0 +1,113 @@
+"""
+End-to-end benchmark of process_accomodation_search_async with a stub LLM.
+
+Groq, Open-Meteo and the hotels API are all served by the fake upstreams, so
+the run measures the assistant's own overhead plus the configured latencies.
+The completion cache is off unless --completion-cache is given.
+
+    python -m benchmarks.bench_assistant --requests 50 --concurrency 10 --llm-latency-ms 300
+"""
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks.harness import REPO_DIR, FakeUpstreams, run_scenario, write_results
+
+ASSISTANT_DIR = os.path.join(REPO_DIR, "accomodation_assistant")
+REVIEWS_PATH = os.path.join(ASSISTANT_DIR, "knowledge_base", "hotel_reviews.json")
+
+SCENARIOS = ["fast_path", "llm_extraction", "streaming"]
+CITIES = ["Bengaluru", "Coimbatore"]
+
+
+def load_assistant(upstream_url: str, state_dir: str, completion_cache: bool):
+    # The assistant reads the environment at import time
+    os.environ.update({
+        "GROQ_BASE_URL": f"{upstream_url}/openai/v1",
+        "GROQ_API_KEY": "benchmark",
+        "OPEN_METEO_URL": f"{upstream_url}/v1/forecast",
+        "HOTELS_API_URL": upstream_url,
+        "COMPLETION_CACHE": str(completion_cache).lower(),
+        "COMPLETION_CACHE_PATH": os.path.join(state_dir, "completion_cache.sqlite3"),
+        "GEOCODE_CACHE_PATH": os.path.join(state_dir, "geocode_cache.json"),
+        "HOTELS_LAST_GOOD_PATH": os.path.join(state_dir, "hotels_last_good.json"),
+    })
+    sys.path.insert(0, ASSISTANT_DIR)
+    import assistant
+    logging.getLogger().setLevel(logging.WARNING)
+    return assistant
+
+
+def prompts(i: int):
+    """The same prompt in a form the rule-based fast path handles and a free-form one that needs the LLM."""
+    city = CITIES[i % len(CITIES)]
+    start = date.today() + timedelta(days=7 + i % 30)
+    end = start + timedelta(days=2)
+    return (f"hotel in {city} from {start.isoformat()} to {end.isoformat()}",
+            f"Could you find somewhere nice for me to sleep in {city} around the middle of next month? Thanks!")
+
+
+def scenario_calls(assistant):
+    async def fast_path(i):
+        if await assistant.process_accomodation_search_async(prompts(i)[0], REVIEWS_PATH) is None:
+            raise RuntimeError("Prompt was not recognised as an accomodation search")
+
+    async def llm_extraction(i):
+        if await assistant.process_accomodation_search_async(prompts(i)[1], REVIEWS_PATH) is None:
+            raise RuntimeError("Prompt was not recognised as an accomodation search")
+
+    async def streaming(i):
+        events = [event async for event, _ in assistant.stream_accomodation_search(prompts(i)[0], REVIEWS_PATH)]
+        if events[-1] != "done":
+            raise RuntimeError(f"Stream ended with {events[-1]}")
+
+    return {"fast_path": fast_path, "llm_extraction": llm_extraction, "streaming": streaming}
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as state_dir, \
+            FakeUpstreams(latency_ms=args.latency_ms, llm_latency_ms=args.llm_latency_ms,
+                          weather_latency_ms=args.weather_latency_ms, jitter=args.jitter,
+                          hotels_per_city=args.hotels_per_city, summary_chars=args.summary_chars) as upstreams:
+        assistant = load_assistant(upstreams.url, state_dir, args.completion_cache)
+        calls = scenario_calls(assistant)
+
+        def reset():
+            assistant.weather_cache.clear()
+
+        results = {}
+        try:
+            for name in args.scenarios:
+                results[name] = await run_scenario(name, calls[name], args.requests, args.concurrency,
+                                                   warmup=args.warmup, alloc_requests=args.alloc_requests, reset=reset)
+        finally:
+            await assistant.close_http_client()
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results("assistant", params, results, args.output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Timed searches per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=4, help="Untimed searches before each scenario")
+    parser.add_argument("--alloc-requests", type=int, default=10, help="Searches run under tracemalloc, 0 to skip")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Fake hotels API latency")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Fake chat completion latency")
+    parser.add_argument("--weather-latency-ms", type=float, default=50, help="Fake forecast latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fake upstream latency jitter fraction")
+    parser.add_argument("--hotels-per-city", type=int, default=50, help="Hotels returned for every city")
+    parser.add_argument("--summary-chars", type=int, default=600, help="Length of free text completions")
+    parser.add_argument("--completion-cache", action="store_true", help="Keep the on-disk completion cache enabled")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--output", help="Result file, defaults to benchmarks/results/assistant-<time>-<commit>.json")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Cold start benchmark: time `import assistant` and `import app.main` in fresh interpreters.
+
+Every run starts a new Python process, so the numbers include what a newly
+started worker pays before serving its first request. The slowest top-level
+imports of the last run are reported from `python -X importtime`.
+
+    python -m benchmarks.bench_import --runs 20
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks.harness import REPO_DIR, summarize, write_results
+
+SCENARIOS = {
+    "assistant": ("accomodation_assistant", "assistant"),
+    "api": ("python_fastapi_hotels", "app.main"),
+}
+
+TIMED_IMPORT = "import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+
+
+def parse_importtime(stderr: str, module: str, top: int) -> dict:
+    """Cumulative milliseconds of the direct imports of `module`, slowest first."""
+    lines = [line for line in stderr.splitlines() if line.startswith("import time:") and "[us]" not in line]
+    timings = []
+    for line in lines:
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative)))
+
+    # A module's line comes after the lines of everything it imported
+    end = next((i for i, (_, name, _) in enumerate(timings) if name == module), None)
+    if end is None:
+        return {}
+    depth = timings[end][0]
+    children = {}
+    for indent, name, cumulative in reversed(timings[:end]):
+        if indent <= depth:
+            break
+        if indent == depth + 2:
+            children[name] = round(cumulative / 1000, 3)
+    slowest = sorted(children.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {"total_ms": round(timings[end][2] / 1000, 3), **dict(slowest)}
+
+
+def time_imports(folder: str, module: str, runs: int, env: dict, top: int) -> dict:
+    cwd = os.path.join(REPO_DIR, folder)
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", TIMED_IMPORT.format(module=module)],
+                                cwd=cwd, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            errors += 1
+            print(result.stderr, file=sys.stderr)
+            continue
+        latencies.append(float(result.stdout.strip().splitlines()[-1]))
+    elapsed = time.perf_counter() - started
+
+    profile = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             cwd=cwd, env=env, capture_output=True, text=True)
+    summary = summarize(latencies, errors, elapsed)
+    summary["slowest_imports_ms"] = parse_importtime(profile.stderr, module, top)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Fresh interpreters per scenario")
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports to report")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Result file, defaults to benchmarks/results/import-<time>-<commit>.json")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as state_dir:
+        # Keep the caches both services open at import time out of the working tree
+        env = {
+            **os.environ,
+            "SHARED_STATE_PATH": os.path.join(state_dir, "hotels_api_state.sqlite3"),
+            "COMPLETION_CACHE_PATH": os.path.join(state_dir, "completion_cache.sqlite3"),
+            "GEOCODE_CACHE_PATH": os.path.join(state_dir, "geocode_cache.json"),
+            "HOTELS_LAST_GOOD_PATH": os.path.join(state_dir, "hotels_last_good.json"),
+        }
+        for name in args.scenarios:
+            folder, module = SCENARIOS[name]
+            results[name] = time_imports(folder, module, args.runs, env, args.top)
+            print(f"{name:<12}p50 {results[name]['p50_ms']:>9.1f} ms   p95 {results[name]['p95_ms']:>9.1f} ms")
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results("import", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare two benchmark result files, e.g. before and after a change.
+
+    python -m benchmarks.compare benchmarks/results/api-...-abc123.json benchmarks/results/api-...-def456.json
+"""
+import sys
+import json
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms", "alloc_peak_kib"]
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def change(before, after) -> str:
+    if not before:
+        return ""
+    return f"{(after - before) / before:+.1%}"
+
+
+def compare(baseline: dict, candidate: dict):
+    print(f"{baseline['benchmark']}: {baseline['commit'][:8]}{'-dirty' if baseline['dirty'] else ''} -> "
+          f"{candidate['commit'][:8]}{'-dirty' if candidate['dirty'] else ''}")
+    if baseline["params"] != candidate["params"]:
+        differing = sorted(key for key in set(baseline["params"]) | set(candidate["params"])
+                           if baseline["params"].get(key) != candidate["params"].get(key))
+        print(f"warning: runs used different parameters: {', '.join(differing)}")
+
+    print(f"{'scenario':<24}{'metric':<18}{'before':>12}{'after':>12}{'change':>10}")
+    for name in baseline["scenarios"]:
+        if name not in candidate["scenarios"]:
+            continue
+        for metric in METRICS:
+            before = baseline["scenarios"][name].get(metric)
+            after = candidate["scenarios"][name].get(metric)
+            if before is None or after is None:
+                continue
+            print(f"{name:<24}{metric:<18}{before:>12}{after:>12}{change(before, after):>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    compare(load(sys.argv[1]), load(sys.argv[2]))
@@ -0,0 +1,255 @@
+"""
+Local stand-ins for every service the hotels API and the assistant call:
+the Amadeus-style token, locations, hotels and sentiments endpoints, a
+Groq-compatible chat completions endpoint, Open-Meteo and the hotels API
+as seen by the assistant.
+
+Latency and payload sizes come from the environment so the harness can
+start it as a subprocess:
+
+    FAKE_LATENCY_MS          Amadeus-style endpoints (default 50)
+    FAKE_LLM_LATENCY_MS      chat completions (default 300)
+    FAKE_WEATHER_LATENCY_MS  forecast (default 50)
+    FAKE_JITTER              +/- fraction applied to every latency (default 0.2)
+    FAKE_HOTELS_PER_CITY     hotels returned by by-city (default 50)
+    FAKE_SUMMARY_CHARS       length of free text completions (default 600)
+
+    python -m uvicorn benchmarks.fake_upstreams:app --port 9100
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+from datetime import date, timedelta
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "50"))
+LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+WEATHER_LATENCY_MS = float(os.getenv("FAKE_WEATHER_LATENCY_MS", "50"))
+JITTER = float(os.getenv("FAKE_JITTER", "0.2"))
+HOTELS_PER_CITY = int(os.getenv("FAKE_HOTELS_PER_CITY", "50"))
+SUMMARY_CHARS = int(os.getenv("FAKE_SUMMARY_CHARS", "600"))
+
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "accomodation_assistant", "knowledge_base", "hotel_reviews.json")
+
+app = FastAPI(title="Fake upstreams")
+
+
+def _knowledge_base_hotels():
+    with open(KNOWLEDGE_BASE, encoding="utf-8") as file:
+        return {city["city"].casefold(): [hotel["hotel_name"] for hotel in city["hotels"]]
+                for city in json.load(file)["cities"]}
+
+
+KB_HOTELS = _knowledge_base_hotels()
+
+
+async def delay(latency_ms: float):
+    if latency_ms > 0:
+        await asyncio.sleep(latency_ms * random.uniform(1 - JITTER, 1 + JITTER) / 1000)
+
+
+def iata_for(city: str) -> str:
+    return hashlib.sha1(city.casefold().encode()).hexdigest()[:3].upper()
+
+
+def hotel(hotel_id: str, name: str, iata_code: str) -> dict:
+    return {
+        "name": name,
+        "hotelId": hotel_id,
+        "chainCode": "FK",
+        "iataCode": iata_code,
+        "dupeId": int(hashlib.sha1(hotel_id.encode()).hexdigest()[:6], 16),
+        "geoCode": {"latitude": 12.97, "longitude": 77.59},
+        "address": {"countryCode": "IN"},
+        "distance": {"value": 1.5, "unit": "KM"},
+        "lastUpdate": "2025-01-01T00:00:00",
+    }
+
+
+def city_hotels(city: str, iata_code: str):
+    names = KB_HOTELS.get(city.casefold(), [])
+    names = names + [f"{city.upper()} HOTEL {i}" for i in range(max(0, HOTELS_PER_CITY - len(names)))]
+    return [hotel(f"{iata_code}{i:05d}", name, iata_code) for i, name in enumerate(names)]
+
+
+# ---------------------------------------------------------------
+# Amadeus-style API
+# ---------------------------------------------------------------
+
+@app.get("/health")
+async def health():
+    return {"ok": True}
+
+
+@app.post("/v1/security/oauth2/token")
+async def token():
+    await delay(LATENCY_MS)
+    return {"access_token": f"fake-{time.time()}", "token_type": "Bearer", "expires_in": 1799}
+
+
+@app.get("/v1/reference-data/locations")
+async def locations(keyword: str):
+    await delay(LATENCY_MS)
+    return {"data": [{"type": "location", "subType": "CITY", "name": keyword.upper(), "iataCode": iata_for(keyword)}]}
+
+
+@app.get("/v1/reference-data/locations/hotels/by-city")
+async def hotels_by_city(cityCode: str):
+    await delay(LATENCY_MS)
+    return {"data": city_hotels(cityCode, cityCode)}
+
+
+@app.get("/v1/reference-data/locations/hotels/by-hotels")
+async def hotels_by_ids(hotelIds: str):
+    await delay(LATENCY_MS)
+    return {"data": [hotel(hotel_id, f"HOTEL {hotel_id}", hotel_id[:3]) for hotel_id in hotelIds.split(",")]}
+
+
+@app.get("/v2/e-reputation/hotel-sentiments")
+async def sentiments(hotelIds: str):
+    await delay(LATENCY_MS)
+    return {"data": [sentiment(hotel_id) for hotel_id in hotelIds.split(",")]}
+
+
+def sentiment(hotel_id: str) -> dict:
+    seed = int(hashlib.sha1(hotel_id.encode()).hexdigest()[:8], 16)
+    return {
+        "hotelId": hotel_id,
+        "type": "hotelSentiment",
+        "overallRating": 60 + seed % 40,
+        "numberOfReviews": 100 + seed % 900,
+        "numberOfRatings": 150 + seed % 900,
+        "sentiments": {name: 50 + (seed >> i) % 50 for i, name in
+                       enumerate(["sleepQuality", "service", "facilities", "roomComforts", "valueForMoney", "catering",
+                                  "location", "internet", "staff"])},
+    }
+
+
+# ---------------------------------------------------------------
+# Hotels API as called by the assistant
+# ---------------------------------------------------------------
+
+@app.get("/hotels")
+async def hotels(city: str):
+    await delay(LATENCY_MS)
+    iata_code = iata_for(city)
+    return {"city": city, "iata_code": iata_code, "hotels": city_hotels(city, iata_code)}
+
+
+@app.post("/hotels/reviews/batch")
+async def reviews_batch(request: Request):
+    await delay(LATENCY_MS)
+    body = await request.json()
+    return {hotel_id: sentiment(hotel_id) for hotel_id in body.get("hotel_ids", [])}
+
+
+# ---------------------------------------------------------------
+# Open-Meteo
+# ---------------------------------------------------------------
+
+@app.get("/v1/forecast")
+async def forecast(latitude: float, longitude: float, start_date: str, end_date: str):
+    await delay(WEATHER_LATENCY_MS)
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    times = [f"{day.isoformat()}T{hour:02d}:00" for day in days for hour in range(24)]
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": {
+            "time": times,
+            "temperature_2m": [round(24 + 6 * ((i % 24) / 24), 1) for i in range(len(times))],
+            "relative_humidity_2m": [60 + i % 20 for i in range(len(times))],
+            "rain": [0.4 if i % 13 == 0 else 0.0 for i in range(len(times))],
+        },
+    }
+
+
+# ---------------------------------------------------------------
+# Groq-compatible chat completions
+# ---------------------------------------------------------------
+
+def _text(message) -> str:
+    content = message.get("content") or ""
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+def _find_city(text: str) -> str:
+    folded = text.casefold()
+    for city in KB_HOTELS:
+        if city in folded:
+            return city.title()
+    return "Bengaluru"
+
+
+def _completion_message(messages, tools):
+    system = _text(messages[0])
+    user = next((_text(message) for message in messages if message.get("role") == "user"), "")
+    start = date.today() + timedelta(days=7)
+    stay = {"city": _find_city(user), "start_date": start.isoformat(), "end_date": (start + timedelta(days=2)).isoformat()}
+
+    if "is_accomodation_search" in system and "start_date" in system:
+        return {"content": json.dumps({"is_accomodation_search": True, **stay})}
+    if "is_accomodation_search" in system:
+        return {"content": json.dumps({"is_accomodation_search": True})}
+    if "Extract the name of the city" in system:
+        return {"content": json.dumps(stay)}
+    if "Hotel Ranking" in system:
+        names = [name for names in KB_HOTELS.values() for name in names if name in user] or ["HOTEL A", "HOTEL B", "HOTEL C"]
+        ranks = {f"rank_{i + 1}": {"hotel_name": names[i % len(names)], "reason": "Safe and well reviewed.",
+                                   "pros": "- Friendly staff\n- Clean rooms", "cons": "- Pricey breakfast"}
+                 for i in range(3)}
+        return {"content": json.dumps(ranks)}
+    if tools and not any(message.get("role") == "tool" for message in messages):
+        arguments = {"latitude": 12.97, "longitude": 77.59, "start_date": stay["start_date"], "end_date": stay["end_date"]}
+        return {"content": None, "tool_calls": [{"id": "call_0", "type": "function", "function": {
+            "name": "get_weather_forecast", "arguments": json.dumps(arguments)}}]}
+    summary = "Expect warm and mostly dry weather with light rain in the evenings. "
+    return {"content": (summary * (SUMMARY_CHARS // len(summary) + 1))[:SUMMARY_CHARS]}
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    message = _completion_message(messages, body.get("tools"))
+    prompt_tokens = sum(len(_text(m)) for m in messages) // 4
+    completion_tokens = len(message.get("content") or "") // 4 + 10
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+             "total_tokens": prompt_tokens + completion_tokens}
+    created = int(time.time())
+
+    await delay(LLM_LATENCY_MS)
+
+    if not body.get("stream"):
+        return JSONResponse({
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                         "message": {"role": "assistant", **message}}],
+            "usage": usage,
+        })
+
+    async def chunks():
+        content = message.get("content") or ""
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        for i, piece in enumerate(pieces):
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": body.get("model"),
+                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            if i == len(pieces) - 1:
+                chunk["choices"][0]["finish_reason"] = "stop"
+                chunk["x_groq"] = {"usage": usage}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(0)
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                     "model": body.get("model"), "choices": [], "usage": usage}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
@@ -0,0 +1,186 @@
+"""Shared pieces of the benchmarks: fake upstream process, load driver, statistics and result files."""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+
+# ---------------------------------------------------------------
+# Fake upstreams
+# ---------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeUpstreams:
+    """Runs benchmarks.fake_upstreams in a uvicorn subprocess so it does not share the harness' event loop."""
+
+    def __init__(self, **settings):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = {**os.environ, **{f"FAKE_{key.upper()}": str(value) for key, value in settings.items()}}
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.fake_upstreams:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning", "--no-access-log"],
+            cwd=REPO_DIR, env=self.env
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("Fake upstreams exited during startup")
+            try:
+                if httpx.get(f"{self.url}/health").status_code == 200:
+                    return self
+            except httpx.TransportError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError("Fake upstreams did not start")
+
+    def __exit__(self, *exc_info):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+# ---------------------------------------------------------------
+# Load driver
+# ---------------------------------------------------------------
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+async def run_load(call, requests: int, concurrency: int) -> dict:
+    """
+    Await `call(i)` for i in range(requests) with at most `concurrency` in flight.
+    A call fails by raising; failures are counted and excluded from latencies.
+    """
+    latencies, errors, first_error = [], 0, None
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, first_error
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                await call(i)
+            except Exception as e:
+                errors += 1
+                first_error = first_error or f"{type(e).__name__}: {e}"
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    stats = summarize(latencies, errors, time.perf_counter() - started)
+    if first_error:
+        stats["first_error"] = first_error
+    return stats
+
+
+async def measure_allocations(call, requests: int, concurrency: int) -> dict:
+    """
+    Re-run the load under tracemalloc. Kept apart from the timed run because
+    tracing slows every allocation down.
+    """
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await run_load(call, requests, concurrency)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_requests": requests,
+        "alloc_peak_kib": round((peak - before) / 1024, 1),
+        "alloc_retained_kib": round((after - before) / 1024, 1),
+    }
+
+
+async def run_scenario(name: str, call, requests: int, concurrency: int, warmup: int = 0,
+                       alloc_requests: int = 0, reset=None) -> dict:
+    """Warm up, time the load, then optionally measure allocations. `reset` runs before each phase."""
+    print(f"  {name}: {requests} requests, concurrency {concurrency}", flush=True)
+    if reset:
+        reset()
+    if warmup:
+        await run_load(call, warmup, concurrency)
+    stats = await run_load(call, requests, concurrency)
+    if alloc_requests:
+        if reset:
+            reset()
+        stats.update(await measure_allocations(call, alloc_requests, concurrency))
+    print(f"    {stats['throughput_rps']} req/s, p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, "
+          f"p99 {stats['p99_ms']} ms, errors {stats['errors']}", flush=True)
+    return stats
+
+
+# ---------------------------------------------------------------
+# Results
+# ---------------------------------------------------------------
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def write_results(benchmark: str, params: dict, scenarios: dict, output: str = None) -> str:
+    """Write one JSON result file tagged with the commit so runs can be compared across commits."""
+    revision = git_revision()
+    now = datetime.now(timezone.utc)
+    results = {
+        "benchmark": benchmark,
+        **revision,
+        "timestamp": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "scenarios": scenarios,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        suffix = "-dirty" if revision["dirty"] else ""
+        output = os.path.join(RESULTS_DIR, f"{benchmark}-{now:%Y%m%dT%H%M%S}-{revision['commit'][:8]}{suffix}.json")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
+    return output
@@ -8,7 +8,9 @@ for folders in [("app", "imports"), ("imports", ),
                 ("app", "generated", "clients", "datago_file_client"),
                 ("app", "generated", "clients", "datago_metadata_client")]:
     p = os.path.join(os.getcwd(), *folders)
-    sys.path.append(p)
+    # Missing folders would only slow down every later import that scans sys.path
+    if os.path.isdir(p) and p not in sys.path:
+        sys.path.append(p)
 
 
 def use_route_names_as_operation_ids(app: FastAPI) -> None:
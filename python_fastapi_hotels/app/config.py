@@ -15,6 +15,57 @@ REVIEW_URL = os.getenv("REVIEW_URL", "")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET", "")
 CLIENT_ID = os.getenv("CLIENT_ID", "")
 
+# SQLite file shared by all workers of a production server, default backend of the caches and token below
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "")
+
+# Seconds before expiry at which the cached access token is refreshed
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "60"))
+TOKEN_STORE_PATH = os.getenv("TOKEN_STORE_PATH", SHARED_STATE_PATH)
+
+# Shared upstream HTTP client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP2 = os.getenv("HTTP2", "true").lower() == "true"
+
+# City -> IATA code cache. Set IATA_CACHE_PATH to a SQLite file to keep it across restarts
+IATA_CACHE_SIZE = int(os.getenv("IATA_CACHE_SIZE", "2048"))
+IATA_CACHE_TTL = int(os.getenv("IATA_CACHE_TTL", str(7 * 24 * 3600)))
+IATA_NEGATIVE_CACHE_TTL = int(os.getenv("IATA_NEGATIVE_CACHE_TTL", "600"))
+# Expired codes are still used for this long when the upstream fails
+IATA_CACHE_STALE_IF_ERROR_TTL = int(os.getenv("IATA_CACHE_STALE_IF_ERROR_TTL", str(7 * 24 * 3600)))
+IATA_CACHE_PATH = os.getenv("IATA_CACHE_PATH", SHARED_STATE_PATH)
+
+# /hotels search response cache. Set HOTELS_CACHE_PATH to a SQLite file for an on-disk backend
+HOTELS_CACHE_SIZE = int(os.getenv("HOTELS_CACHE_SIZE", "1024"))
+HOTELS_CACHE_MAX_BYTES = int(os.getenv("HOTELS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+HOTELS_CACHE_TTL = int(os.getenv("HOTELS_CACHE_TTL", "900"))
+HOTELS_CACHE_STALE_TTL = int(os.getenv("HOTELS_CACHE_STALE_TTL", "3600"))
+HOTELS_CACHE_PATH = os.getenv("HOTELS_CACHE_PATH", SHARED_STATE_PATH)
+# Expired search results are still served for this long when the upstream fails
+HOTELS_CACHE_STALE_IF_ERROR_TTL = int(os.getenv("HOTELS_CACHE_STALE_IF_ERROR_TTL", str(24 * 3600)))
+
+# Batch endpoints: ids accepted per request and ids sent per upstream call
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "100"))
+HOTELS_UPSTREAM_MAX_IDS = int(os.getenv("HOTELS_UPSTREAM_MAX_IDS", "20"))
+SENTIMENTS_UPSTREAM_MAX_IDS = int(os.getenv("SENTIMENTS_UPSTREAM_MAX_IDS", "3"))
+
+# Upstream resilience: retries for idempotent requests, hedging of GETs (0 disables) and per-host circuit breakers
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "2"))
+HEDGE_AFTER = float(os.getenv("HEDGE_AFTER", "0"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Accomodation assistant served by the streaming endpoint, its resilience module is shared with this service
+ASSISTANT_DIR = os.path.abspath(os.getenv("ASSISTANT_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "accomodation_assistant")))
+REVIEWS_JSON_PATH = os.getenv("REVIEWS_JSON_PATH", os.path.join(ASSISTANT_DIR, "knowledge_base", "hotel_reviews.json"))
+
 if not TOKEN_URL:
     raise HTTPException(status_code=400, detail="Token URL missing")
 
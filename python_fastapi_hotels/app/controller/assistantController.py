@@ -0,0 +1,51 @@
+import json
+import logging
+import sys
+from functools import lru_cache
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app import config
+from app.services.httpClient import get_http_client
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+
+# The assistant lives next to this service and pulls in openai/numpy, so import it on first use.
+# Its folder goes first so its flat modules (assistant, cache, ...) win over same-named packages
+@lru_cache(maxsize=1)
+def get_assistant():
+    if config.ASSISTANT_DIR not in sys.path:
+        sys.path.insert(0, config.ASSISTANT_DIR)
+    import assistant
+    return assistant
+
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get('/assistant/search/stream', tags=['Assistant'])
+async def stream_accomodation_search(query: str = Query(..., description="Accomodation search prompt"),
+                                     client: httpx.AsyncClient = Depends(get_http_client)):
+    try:
+        assistant = get_assistant()
+    except ImportError:
+        logger.exception("Could not import the assistant")
+        raise HTTPException(status_code=503, detail="Assistant unavailable")
+    # The assistant's weather and hotels calls share the app's pool, which the lifespan closes
+    await assistant.use_http_client(client)
+
+    async def events():
+        try:
+            async for event, data in assistant.stream_accomodation_search(query, config.REVIEWS_JSON_PATH):
+                yield format_event(event, data)
+        except Exception:
+            logger.exception("Assistant search failed")
+            yield format_event("error", {"detail": "Internal Server Error"})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
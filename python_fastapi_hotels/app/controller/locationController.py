@@ -1,79 +1,218 @@
+import asyncio
+import hashlib
 import json
-from fastapi import APIRouter, HTTPException, Query
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from typing import List
 import httpx
-import os
-import requests
 from typing_extensions import Optional
 
 from app import config
 from app.models.inputModels import *
+from app.services.background import run_in_background
+from app.services.cache import CacheEntry, create_cache, make_key
+from app.services.httpClient import get_http_client
+from app.services.metrics import record_cache_lookup, track_upstream
+from app.services.resilience import UpstreamUnavailable, upstream_get
+from app.services.singleFlight import upstream_calls
+from app.services.tokenManager import token_manager
 
 router = APIRouter()
 
-# Helper function to get access token
-async def get_access_token() -> str:
-    async with httpx.AsyncClient() as client:
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": config.CLIENT_ID,
-            "client_secret": config.CLIENT_SECRET
-        }
-        response = await client.post(config.TOKEN_URL, data=payload)
-        response.raise_for_status()
-        return response.json().get("access_token")
+# City -> IATA code. A None value caches a "City not found" answer
+iata_cache = create_cache(config.IATA_CACHE_SIZE, config.IATA_CACHE_PATH, table="iata_codes")
+
+# (iata_code, amenities, ratings) -> {"hotels": [...], "etag": ...}
+hotels_cache = create_cache(config.HOTELS_CACHE_SIZE, config.HOTELS_CACHE_PATH, table="hotels_search",
+                            max_bytes=config.HOTELS_CACHE_MAX_BYTES)
+_revalidating = set()
 
+# Helper function to get access token (cached process-wide until shortly before expiry)
+async def get_access_token(client: httpx.AsyncClient) -> str:
+    return await token_manager.get_token(client)
 
-# Helper function to get IATA code
-async def get_iata_code(city: str, token: str) -> str:
-    async with httpx.AsyncClient() as client:
-        headers = {'Authorization': f'Bearer {token}'}
-        params = {"keyword": city, "subType": "CITY"}
 
-        response = await client.get(config.BASE_URL, headers=headers, params=params)
+# Runs fetch(client, *args, token, **kwargs) once per key across concurrent callers. A 401 means the
+# upstream revoked the token before its expiry, so it is dropped and the call retried once with a new one
+async def call_with_token(key: tuple, fetch, client: httpx.AsyncClient, *args, **kwargs):
+    token = await get_access_token(client)
+    try:
+        return await upstream_calls.do(key, fetch, client, *args, token, **kwargs)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 401:
+            raise
+    token_manager.invalidate(token)
+    token = await get_access_token(client)
+    return await upstream_calls.do(key, fetch, client, *args, token, **kwargs)
+
+
+# Helper function to look up city locations by keyword
+async def fetch_city_locations(client: httpx.AsyncClient, city: str, token: str) -> List[dict]:
+    headers = {'Authorization': f'Bearer {token}'}
+    params = {"keyword": city, "subType": "CITY"}
+
+    async with track_upstream("locations"):
+        response = await upstream_get(client, config.BASE_URL, headers=headers, params=params)
         response.raise_for_status()
 
-        city_data = response.json().get("data", [])
-        if not city_data:
+    return response.json().get("data", [])
+
+
+# Helper function to get IATA code. The token is only fetched when the upstream has to be asked,
+# and an expired code is still used when the token or locations upstream fails
+async def get_iata_code(client: httpx.AsyncClient, city: str) -> str:
+    cache_key = city.strip().casefold()
+    cached = iata_cache.get(cache_key)
+    record_cache_lookup("iata", "miss" if cached is None else "stale" if cached.is_stale() else "hit")
+    if cached is not None and not cached.is_stale():
+        if cached.value is None:
             raise HTTPException(status_code=404, detail="City not found")
+        return cached.value
 
-        return city_data[0]["iataCode"]
+    try:
+        city_data = await call_with_token(("locations", cache_key), fetch_city_locations, client, city)
+    except (UpstreamUnavailable, httpx.HTTPError):
+        # Negative answers are cached without a stale window, so a stale entry always holds a code
+        if cached is None:
+            raise
+        return cached.value
+
+    if not city_data:
+        iata_cache.set(cache_key, None, config.IATA_NEGATIVE_CACHE_TTL)
+        raise HTTPException(status_code=404, detail="City not found")
+
+    iata_code = city_data[0]["iataCode"]
+    iata_cache.set(cache_key, iata_code, config.IATA_CACHE_TTL, config.IATA_CACHE_STALE_IF_ERROR_TTL)
+    return iata_code
 
 
 # Helper function to get hotels by IATA code
-async def get_hotels_by_iata(iata_code: str, token: str, **kwargs: Dict[str, Any]) -> List[dict]:
-    async with httpx.AsyncClient() as client:
-        hotels_url = f"{config.BASE_URL}/hotels/by-city"
-        headers = {'Authorization': f'Bearer {token}'}
-        params = {
-            "cityCode": iata_code,
-            **{k:v for k, v in kwargs.items() if v}
-        }
-
-        response = await client.get(hotels_url, headers=headers, params=params)
+async def get_hotels_by_iata(client: httpx.AsyncClient, iata_code: str, token: str, **kwargs: Dict[str, Any]) -> List[dict]:
+    hotels_url = f"{config.BASE_URL}/hotels/by-city"
+    headers = {'Authorization': f'Bearer {token}'}
+    params = {
+        "cityCode": iata_code,
+        **{k:v for k, v in kwargs.items() if v}
+    }
+
+    async with track_upstream("by-city"):
+        response = await upstream_get(client, hotels_url, headers=headers, params=params)
         response.raise_for_status()
 
-        return response.json().get("data", [])
+    return response.json().get("data", [])
+
+
+# Accepts repeated values, comma separated values and "[5,4,3]" style lists
+def normalize_list_param(values: Optional[List[str]]) -> List[str]:
+    items = set()
+    for value in values or []:
+        for item in value.strip("[] ").split(","):
+            item = item.strip("[] ").upper()
+            if item:
+                items.add(item)
+    return sorted(items)
+
+
+async def fetch_hotels_entry(client: httpx.AsyncClient, cache_key: str, iata_code: str, **params) -> CacheEntry:
+    hotels = await call_with_token(("by-city", cache_key), get_hotels_by_iata, client, iata_code, **params)
+    etag = hashlib.sha1(json.dumps(hotels, sort_keys=True).encode("utf-8")).hexdigest()
+    return hotels_cache.set(cache_key, {"hotels": hotels, "etag": f'"{etag}"'}, config.HOTELS_CACHE_TTL,
+                            config.HOTELS_CACHE_STALE_TTL + config.HOTELS_CACHE_STALE_IF_ERROR_TTL)
+
+
+# Errors propagate to run_in_background, which logs them; the stale entry stays
+# in the cache and the next request retries
+async def revalidate_hotels(client: httpx.AsyncClient, cache_key: str, iata_code: str, **params):
+    try:
+        await fetch_hotels_entry(client, cache_key, iata_code, **params)
+    finally:
+        _revalidating.discard(cache_key)
+
+
+# Serves fresh entries directly and stale entries while refreshing them in the background.
+# Past the stale-while-revalidate window the upstream is asked first and the stale
+# entry is only served if it, or the token endpoint, fails.
+async def get_hotels_cached(client: httpx.AsyncClient, iata_code: str,
+                            amenities: List[str], ratings: List[str]) -> CacheEntry:
+    cache_key = make_key(iata_code, amenities, ratings)
+    params = {}
+    if amenities:
+        params['amenities'] = ",".join(amenities)
+    if ratings:
+        params['ratings'] = ",".join(ratings)
+
+    entry = hotels_cache.get(cache_key)
+    record_cache_lookup("hotels", "miss" if entry is None else "stale" if entry.is_stale() else "hit")
+    if entry is None:
+        return await fetch_hotels_entry(client, cache_key, iata_code, **params)
+
+    if not entry.is_stale():
+        return entry
+
+    if time.time() < entry.expires_at + config.HOTELS_CACHE_STALE_TTL:
+        if cache_key not in _revalidating:
+            _revalidating.add(cache_key)
+            run_in_background(revalidate_hotels(client, cache_key, iata_code, **params),
+                              name=f"revalidate-hotels-{iata_code}")
+        return entry
+
+    try:
+        return await fetch_hotels_entry(client, cache_key, iata_code, **params)
+    except (UpstreamUnavailable, httpx.HTTPError):
+        return entry
+
+
+# Helper function to get hotel details for comma separated hotel ids
+async def fetch_hotels_by_ids(client: httpx.AsyncClient, hotel_ids: str, token: str) -> List[dict]:
+    hotels_url = f"{config.BASE_URL}/hotels/by-hotels"
+    headers = {'Authorization': f'Bearer {token}'}
+    param = {'hotelIds': hotel_ids}
+    async with track_upstream("by-hotels"):
+        response = await upstream_get(client, hotels_url, headers=headers, params=param)
+        response.raise_for_status()
+    return response.json().get("data", [])
+
+
+# Helper function to get hotel sentiments for comma separated hotel ids
+async def fetch_sentiments_by_ids(client: httpx.AsyncClient, hotel_ids: str, token: str) -> List[dict]:
+    review_url = f"{config.REVIEW_URL}/e-reputation/hotel-sentiments"
+    headers = {'Authorization': f'Bearer {token}'}
+    param = {'hotelIds': hotel_ids}
+    async with track_upstream("sentiments"):
+        response = await upstream_get(client, review_url, headers=headers, params=param)
+        response.raise_for_status()
+    return response.json().get("data", [])
+
+
+def cache_headers(entry: CacheEntry) -> Dict[str, str]:
+    max_age = max(0, int(entry.expires_at - time.time()))
+    return {
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={config.HOTELS_CACHE_STALE_TTL}, "
+                         f"stale-if-error={config.HOTELS_CACHE_STALE_IF_ERROR_TTL}",
+        "ETag": entry.value["etag"]
+    }
 
 
 @router.get('/hotels', response_model= CityResponse, responses={404: {"model": ErrorResponse}})
-async def search_hotels(city: str = Query(..., description="City name"),
+async def search_hotels(request: Request,
+                        response: Response,
+                        city: str = Query(..., description="City name"),
                         amenities: Optional[List[str]] = Query(None, description="Amenities available in hotel"),
-                        ratings: Optional[List[str]] = Query(None, description="Hotel stars. Up to four values can be requested at the same time in a comma separated list."),):
+                        ratings: Optional[List[str]] = Query(None, description="Hotel stars. Up to four values can be requested at the same time in a comma separated list."),
+                        client: httpx.AsyncClient = Depends(get_http_client)):
     try:
-        token = await get_access_token()
-        iata_code = await get_iata_code(city, token)
+        iata_code = await get_iata_code(client, city)
 
-        params = {}
-        if amenities:
-            params['amenities'] = amenities
-        if ratings:
-            params['ratings'] = ratings
+        entry = await get_hotels_cached(client, iata_code,
+                                        normalize_list_param(amenities), normalize_list_param(ratings))
+        headers = cache_headers(entry)
 
-        hotels = await get_hotels_by_iata(iata_code, token, **params)
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
 
-        return {"city": city, "iata_code": iata_code, "hotels": hotels}
+        response.headers.update(headers)
+        return {"city": city, "iata_code": iata_code, "hotels": entry.value["hotels"]}
 
     except HTTPException as e:
         raise e
@@ -83,10 +222,9 @@ async def search_hotels(city: str = Query(..., description="City name"),
 
 # Endpoint to get city IATA code only
 @router.get('/hotels/city/{city}', response_model=CityResponse, responses={404: {"model": ErrorResponse}})
-async def get_city_iata(city: str):
+async def get_city_iata(city: str, client: httpx.AsyncClient = Depends(get_http_client)):
     try:
-        token = await get_access_token()
-        iata_code = await get_iata_code(city, token)
+        iata_code = await get_iata_code(client, city)
 
         return {"city": city, "iata_code": iata_code, "hotels": []}
 
@@ -98,21 +236,14 @@ async def get_city_iata(city: str):
 
 # Hotel by ID endpoint with renamed path
 @router.get('/hotels/id/{hotel_id}', response_model=Hotel, responses={404: {"model": ErrorResponse}})
-async def search_hotel_by_id(hotel_id: str):
+async def search_hotel_by_id(hotel_id: str, client: httpx.AsyncClient = Depends(get_http_client)):
     try:
-        token = await get_access_token()
-        async with httpx.AsyncClient() as client:
-            hotels_url = f"{config.BASE_URL}/hotels/by-hotels"
-            headers = {'Authorization': f'Bearer {token}'}
-            param = {'hotelIds': hotel_id}
-            response = await client.get(hotels_url, headers=headers, params=param)
-            response.raise_for_status()
-            hotels = response.json().get("data", [])
+        hotels = await call_with_token(("by-hotels", hotel_id), fetch_hotels_by_ids, client, hotel_id)
 
-            if not hotels:
-                raise HTTPException(status_code=404, detail="Hotel not found")
+        if not hotels:
+            raise HTTPException(status_code=404, detail="Hotel not found")
 
-            return hotels[0]
+        return hotels[0]
 
     except HTTPException as e:
         raise e
@@ -121,21 +252,42 @@ async def search_hotel_by_id(hotel_id: str):
 
 
 @router.get('/hotels/review/{hotel_id}')
-async def search_review_by_id(hotel_id: str):
+async def search_review_by_id(hotel_id: str, client: httpx.AsyncClient = Depends(get_http_client)):
     try:
-        token = await get_access_token()
-        async with httpx.AsyncClient() as client:
-            review_url = f"{config.REVIEW_URL}/e-reputation/hotel-sentiments"
-            headers = {'Authorization': f'Bearer {token}'}
-            param = {'hotelIds': hotel_id}
-            response = await client.get(review_url, headers=headers, params=param)
-            response.raise_for_status()
-            hotels = response.json().get("data", [])
+        hotels = await call_with_token(("sentiments", hotel_id), fetch_sentiments_by_ids, client, hotel_id)
+
+        if not hotels:
+            raise HTTPException(status_code=404, detail="Hotel not found")
+
+        return hotels[0]
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
 
-            if not hotels:
-                raise HTTPException(status_code=404, detail="Hotel not found")
+# Splits ids into comma separated chunks the upstream accepts and fetches them concurrently
+async def fetch_in_chunks(client: httpx.AsyncClient, target: str, fetch, hotel_ids: List[str],
+                          chunk_size: int) -> Dict[str, Optional[dict]]:
+    hotel_ids = list(dict.fromkeys(hotel_id.strip() for hotel_id in hotel_ids if hotel_id.strip()))
+    if not hotel_ids:
+        raise HTTPException(status_code=400, detail="No hotel ids given")
+    if len(hotel_ids) > config.BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {config.BATCH_MAX_IDS} hotel ids can be requested")
 
-            return hotels[0]
+    chunks = [",".join(hotel_ids[i:i + chunk_size]) for i in range(0, len(hotel_ids), chunk_size)]
+    results = await asyncio.gather(*[call_with_token((target, chunk), fetch, client, chunk) for chunk in chunks])
+
+    found = {hotel["hotelId"]: hotel for result in results for hotel in result if hotel.get("hotelId")}
+    return {hotel_id: found.get(hotel_id) for hotel_id in hotel_ids}
+
+
+@router.post('/hotels/batch', response_model=Dict[str, Optional[Hotel]], responses={400: {"model": ErrorResponse}})
+async def search_hotels_by_ids(body: HotelIdsRequest, client: httpx.AsyncClient = Depends(get_http_client)):
+    try:
+        return await fetch_in_chunks(client, "by-hotels", fetch_hotels_by_ids, body.hotel_ids,
+                                     config.HOTELS_UPSTREAM_MAX_IDS)
 
     except HTTPException as e:
         raise e
@@ -143,3 +295,13 @@ async def search_review_by_id(hotel_id: str):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.post('/hotels/reviews/batch', responses={400: {"model": ErrorResponse}})
+async def search_reviews_by_ids(body: HotelIdsRequest, client: httpx.AsyncClient = Depends(get_http_client)):
+    try:
+        return await fetch_in_chunks(client, "sentiments", fetch_sentiments_by_ids, body.hotel_ids,
+                                     config.SENTIMENTS_UPSTREAM_MAX_IDS)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,17 +1,39 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response
 from app import config
 
 # controllers
-from .controller import locationController
+from .controller import assistantController, locationController
+from .services.background import cancel_background_tasks
+from .services.httpClient import create_http_client
+from .services.metrics import MetricsMiddleware, mark_worker_stopped, metrics_response, track_http_pool
 
-app = FastAPI(docs_url="/docs", redoc_url="/re-docs", title="Hackathon API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+   # One pooled upstream client shared by every request
+   app.state.http_client = create_http_client()
+   track_http_pool(app.state.http_client)
+   yield
+   await cancel_background_tasks()
+   await app.state.http_client.aclose()
+   mark_worker_stopped()
+
+
+app = FastAPI(docs_url="/docs", redoc_url="/re-docs", title="Hackathon API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/", tags=['Information'])
 async def root():
    return {"message": "Service is running...", "result": True}
+
+
+@app.get("/metrics", tags=['Information'], include_in_schema=False)
+async def metrics():
+   return metrics_response()
     
    
-controllers = [locationController]
+controllers = [locationController, assistantController]
  
 for controller in controllers:
-   app.include_router(controller.router)
\ No newline at end of file
+   app.include_router(controller.router)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Union, List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Union, List, Dict, Any, Optional
 
 # Pydantic models for structured response
 class Hotel(BaseModel):
@@ -25,4 +25,5 @@ class ErrorResponse(BaseModel):
     error: str = None
 
 
-
+class HotelIdsRequest(BaseModel):
+    hotel_ids: List[str] = Field(..., min_length=1, description="Hotel ids to look up")
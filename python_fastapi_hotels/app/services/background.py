@@ -0,0 +1,33 @@
+import asyncio
+import logging
+from typing import Coroutine, Set
+
+logger = logging.getLogger(__name__)
+
+# The event loop only keeps weak references to tasks, hold them until they finish
+_tasks: Set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Coroutine, name: str) -> asyncio.Task:
+    """
+    Start `coro` without awaiting it. The task is referenced until it finishes
+    and an exception it raises is logged instead of being lost.
+    """
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+def _finished(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed", task.get_name(), exc_info=task.exception())
+
+
+async def cancel_background_tasks():
+    """Cancel what is still running, called when the app shuts down."""
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,197 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float
+    # Entries past expires_at but before stale_until may still be served while revalidating
+    stale_until: float
+
+    def is_stale(self, now: float = None) -> bool:
+        return (now or time.time()) >= self.expires_at
+
+    def is_expired(self, now: float = None) -> bool:
+        return (now or time.time()) >= self.stale_until
+
+
+def make_key(*parts: Any) -> str:
+    return json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _size_of(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+class MemoryCache:
+    """
+    Bounded in-process LRU cache with a TTL per entry. When `max_bytes` is set,
+    least recently used entries are also evicted once the JSON size of all
+    values exceeds it.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.is_expired():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0) -> CacheEntry:
+        now = time.time()
+        entry = CacheEntry(value, now + ttl, now + ttl + stale_ttl)
+        size = _size_of(value) if self.max_bytes else 0
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._sizes[key] = size
+            self._total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or (self.max_bytes and self._total_bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self._total_bytes -= self._sizes.pop(key, 0)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Persistent cache in a local SQLite file, so entries survive restarts.
+    Values must be JSON serialisable. When `max_bytes` is set, least recently
+    used rows are evicted once the stored values exceed it.
+    """
+
+    def __init__(self, path: str, table: str = "cache", max_bytes: int = 0):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            f"stale_until REAL NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at, stale_until FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.max_bytes:
+                self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        if row is None:
+            return None
+        entry = CacheEntry(json.loads(row[0]), row[1], row[2])
+        if entry.is_expired():
+            self.delete(key)
+            return None
+        return entry
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0) -> CacheEntry:
+        now = time.time()
+        entry = CacheEntry(value, now + ttl, now + ttl + stale_ttl)
+        data = json.dumps(value, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, stale_until, size, accessed_at) "
+                f"VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, entry.expires_at, entry.stale_until, len(data), now)
+            )
+            if self.max_bytes:
+                self._evict()
+        return entry
+
+    def _evict(self):
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self._conn.execute(f"DELETE FROM {self.table} WHERE stale_until <= ?", (time.time(),))
+        rows = self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at DESC").fetchall()
+        keep = 0
+        for key, size in rows:
+            keep += size
+            if keep > self.max_bytes:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+
+class TieredCache:
+    """
+    Memory cache in front of an optional persistent cache. Hits on the
+    persistent layer are promoted to memory with their remaining TTL.
+    """
+
+    def __init__(self, memory: MemoryCache, persistent: SQLiteCache = None):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is not None or self.persistent is None:
+            return entry
+
+        entry = self.persistent.get(key)
+        if entry is not None:
+            now = time.time()
+            self.memory.set(key, entry.value, entry.expires_at - now, entry.stale_until - entry.expires_at)
+        return entry
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0) -> CacheEntry:
+        if self.persistent is not None:
+            self.persistent.set(key, value, ttl, stale_ttl)
+        return self.memory.set(key, value, ttl, stale_ttl)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+
+def create_cache(max_entries: int, sqlite_path: str = "", table: str = "cache", max_bytes: int = 0) -> TieredCache:
+    persistent = SQLiteCache(sqlite_path, table, max_bytes) if sqlite_path else None
+    return TieredCache(MemoryCache(max_entries, max_bytes), persistent)
@@ -0,0 +1,24 @@
+import httpx
+from fastapi import Request
+
+from app import config
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the shared upstream client with bounded, keep-alive connection pool."""
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(
+        config.HTTP_TIMEOUT,
+        connect=config.HTTP_CONNECT_TIMEOUT,
+        pool=config.HTTP_POOL_TIMEOUT
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=config.HTTP2)
+
+
+# Dependency returning the client created in the app lifespan
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
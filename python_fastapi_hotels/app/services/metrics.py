@@ -0,0 +1,133 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from app.services.background import run_in_background
+
+# Set by the production server: every worker writes its samples there and /metrics aggregates them
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUESTS = Counter("http_requests", "Requests served", ["method", "route", "status"])
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency", ["method", "route"],
+                            buckets=LATENCY_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being served", multiprocess_mode="livesum")
+
+UPSTREAM_REQUESTS = Counter("upstream_requests", "Upstream calls", ["target", "outcome"])
+UPSTREAM_SECONDS = Histogram("upstream_request_duration_seconds", "Upstream call latency, retries included",
+                             ["target"], buckets=LATENCY_BUCKETS)
+UPSTREAM_IN_FLIGHT = Gauge("upstream_requests_in_flight", "Upstream calls waiting for an answer", ["target"],
+                           multiprocess_mode="livesum")
+
+# Hit ratio: rate(cache_lookups_total{result!="miss"}[5m]) / rate(cache_lookups_total[5m])
+CACHE_LOOKUPS = Counter("cache_lookups", "Cache lookups by result (hit, stale, miss)", ["cache", "result"])
+
+HTTP_POOL_CONNECTIONS = Gauge("http_pool_connections", "Upstream pool connections", ["state"], multiprocess_mode="livesum")
+HTTP_POOL_MAX_CONNECTIONS = Gauge("http_pool_max_connections", "Upstream pool connection limit", multiprocess_mode="livesum")
+HTTP_POOL_REQUESTS_WAITING = Gauge("http_pool_requests_waiting", "Upstream requests waiting for a pool connection",
+                                   multiprocess_mode="livesum")
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting and timing requests per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope, unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route).observe(time.perf_counter() - started)
+            REQUESTS.labels(scope["method"], route, str(status)).inc()
+
+
+@asynccontextmanager
+async def track_upstream(target: str):
+    """Time one upstream call; the outcome is "ok" unless the block raises."""
+    UPSTREAM_IN_FLIGHT.labels(target).inc()
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.labels(target).dec()
+        UPSTREAM_SECONDS.labels(target).observe(time.perf_counter() - started)
+        UPSTREAM_REQUESTS.labels(target, outcome).inc()
+
+
+def record_cache_lookup(cache: str, result: str):
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def track_http_pool(client: httpx.AsyncClient, interval: float = 5):
+    """
+    Report the connection pool of the shared client. A single process reads it
+    at scrape time; with several workers each one samples its pool every
+    `interval` seconds, since only written values reach the other processes.
+    The sampling task runs until the app cancels its background tasks.
+    """
+    # httpx does not expose its pool, fall back to nothing when its internals change
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if pool is None:
+        return
+
+    readers = {
+        HTTP_POOL_CONNECTIONS.labels("active"): lambda: sum(1 for c in pool.connections if not c.is_idle()),
+        HTTP_POOL_CONNECTIONS.labels("idle"): lambda: sum(1 for c in pool.connections if c.is_idle()),
+        HTTP_POOL_MAX_CONNECTIONS: lambda: getattr(pool, "_max_connections", 0) or 0,
+        HTTP_POOL_REQUESTS_WAITING: lambda: sum(1 for r in getattr(pool, "_requests", []) if r.connection is None),
+    }
+
+    if not MULTIPROCESS_DIR:
+        for gauge, read in readers.items():
+            gauge.set_function(read)
+        return
+
+    async def sample():
+        while True:
+            for gauge, read in readers.items():
+                gauge.set(read())
+            await asyncio.sleep(interval)
+
+    run_in_background(sample(), name="http-pool-sampler")
+
+
+def mark_worker_stopped():
+    """Drop this worker's live gauges from the aggregated metrics."""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def metrics_response() -> Response:
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
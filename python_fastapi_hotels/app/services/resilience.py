@@ -0,0 +1,159 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException
+
+from app import config
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(HTTPException):
+    """Upstream failed after retries, timed out or is short-circuited by its breaker."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. After that one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+
+    Every call that `allow()` lets through must end in record_success,
+    record_failure or release, otherwise a half-open breaker stays closed to
+    everyone.
+    """
+
+    def __init__(self, failure_threshold: int = config.BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = config.BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that got no answer, e.g. because it was cancelled, without counting it either way."""
+        self._trial_in_flight = False
+
+
+breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    breaker = breakers.get(host)
+    if breaker is None:
+        breaker = breakers.setdefault(host, CircuitBreaker())
+    return breaker
+
+
+def backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform between 0 and the capped exponential delay
+    return random.uniform(0, min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def _hedged_get(client: httpx.AsyncClient, url: str, hedge_after: float, **kwargs) -> httpx.Response:
+    """Send a second identical request if the first has not answered within `hedge_after` seconds."""
+    first = asyncio.create_task(client.get(url, **kwargs))
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return first.result()
+
+        tasks.append(asyncio.create_task(client.get(url, **kwargs)))
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Also when the caller is cancelled, no request may outlive it
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def upstream_get(client: httpx.AsyncClient, url: str, retries: int = config.RETRY_ATTEMPTS,
+                       hedge_after: Optional[float] = config.HEDGE_AFTER, **kwargs) -> httpx.Response:
+    """GET through upstream_request, hedged when the upstream is slow to answer."""
+    return await upstream_request(client, "GET", url, retries, hedge_after, **kwargs)
+
+
+async def upstream_request(client: httpx.AsyncClient, method: str, url: str, retries: int = config.RETRY_ATTEMPTS,
+                           hedge_after: Optional[float] = None, **kwargs) -> httpx.Response:
+    """
+    Idempotent request with jittered exponential retries on transport errors
+    and retryable status codes, hedging for slow GETs and a per-host circuit
+    breaker. Raises UpstreamUnavailable when the upstream cannot answer.
+    """
+    breaker = get_breaker(url)
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise UpstreamUnavailable(status_code=503, detail="Upstream temporarily unavailable")
+
+        try:
+            if hedge_after and method == "GET":
+                response = await _hedged_get(client, url, hedge_after, **kwargs)
+            else:
+                response = await client.request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            breaker.record_failure()
+            error = UpstreamUnavailable(status_code=504, detail="Upstream timed out")
+        except httpx.TransportError:
+            breaker.record_failure()
+            error = UpstreamUnavailable(status_code=502, detail="Upstream unreachable")
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled before the upstream answered (e.g. the client went away), that says nothing about its health
+            breaker.release()
+            raise
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            error = UpstreamUnavailable(status_code=502, detail=f"Upstream error {response.status_code}")
+
+        if attempt < retries:
+            await asyncio.sleep(backoff_delay(attempt))
+
+    raise error
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the
+    coroutine, later callers await the same in-flight result. The key is
+    released as soon as the call completes, so nothing is cached.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        # A cancelled caller must not cancel the call for everyone else
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved when every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self):
+        return len(self._calls)
+
+
+upstream_calls = SingleFlight()
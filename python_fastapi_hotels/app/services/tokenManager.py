@@ -0,0 +1,143 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+import httpx
+
+from app import config
+from app.services.background import run_in_background
+from app.services.metrics import track_upstream
+from app.services.resilience import upstream_request
+
+
+class TokenStore:
+    """
+    Access token kept in a SQLite file so that every worker process of the
+    server reuses the token the first one fetched. Expiry is wall-clock time.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS access_tokens (client_id TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT token, expires_at FROM access_tokens WHERE client_id = ?", (config.CLIENT_ID,)
+            ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def set(self, token: str, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO access_tokens (client_id, token, expires_at) VALUES (?, ?, ?)",
+                (config.CLIENT_ID, token, expires_at)
+            )
+
+
+class TokenManager:
+    """
+    Process-wide cache for the upstream OAuth access token.
+
+    The token is reused until `refresh_margin` seconds before it expires, or
+    half its lifetime for tokens shorter than twice the margin. Inside that
+    window callers still get the cached token while a single background task
+    fetches a new one. Once expired, concurrent callers wait on one lock so
+    that only one of them hits the token endpoint. With a `store`, a token
+    fetched by another worker process is picked up before fetching a new one.
+    """
+
+    def __init__(self, refresh_margin: int = config.TOKEN_REFRESH_MARGIN, store: TokenStore = None):
+        self.refresh_margin = refresh_margin
+        self.store = store
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.monotonic() < self._refresh_at
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    async def _fetch(self, client: httpx.AsyncClient):
+        payload = {
+            "grant_type": "client_credentials",
+            "client_id": config.CLIENT_ID,
+            "client_secret": config.CLIENT_SECRET
+        }
+        # Asking for another client credentials token is safe to repeat
+        async with track_upstream("token"):
+            response = await upstream_request(client, "POST", config.TOKEN_URL, data=payload)
+            response.raise_for_status()
+        return response.json()
+
+    def _set_token(self, token: str, expires_in: float):
+        now = time.monotonic()
+        self._token = token
+        self._expires_at = now + expires_in
+        # Without the floor a token living shorter than the margin would be refetched on every call
+        self._refresh_at = now + max(expires_in * 0.5, expires_in - self.refresh_margin)
+
+    def _load_shared(self):
+        shared = self.store.get()
+        if shared is not None and shared[0]:
+            self._set_token(shared[0], shared[1] - time.time())
+
+    async def _refresh(self, client: httpx.AsyncClient):
+        async with self._lock:
+            # Another caller may have refreshed while we were waiting for the lock
+            if self._is_fresh():
+                return self._token
+
+            if self.store is not None:
+                self._load_shared()
+                if self._is_fresh():
+                    return self._token
+
+            data = await self._fetch(client)
+            expires_in = int(data.get("expires_in", 0))
+            self._set_token(data.get("access_token"), expires_in)
+            if self.store is not None:
+                self.store.set(self._token, time.time() + expires_in)
+            return self._token
+
+    def _schedule_refresh(self, client: httpx.AsyncClient):
+        if self._refresh_task is None or self._refresh_task.done():
+            # A failed refresh is logged and retried by the next caller
+            self._refresh_task = run_in_background(self._refresh(client), name="token-refresh")
+
+    async def get_token(self, client: httpx.AsyncClient) -> str:
+        if self._is_fresh():
+            return self._token
+
+        if self._is_valid():
+            self._schedule_refresh(client)
+            return self._token
+
+        return await self._refresh(client)
+
+    def invalidate(self, token: str = None):
+        """
+        Drop the cached token, e.g. after the upstream rejected it with 401.
+        With `token`, only if that is still the cached one, so that callers
+        rejected at the same time do not drop the token fetched after the first.
+        """
+        if token is None or token == self._token:
+            self._token = None
+            self._expires_at = self._refresh_at = 0.0
+        if self.store is not None:
+            shared = self.store.get()
+            if shared is not None and (token is None or shared[0] == token):
+                self.store.set("", 0.0)
+
+
+token_manager = TokenManager(store=TokenStore(config.TOKEN_STORE_PATH) if config.TOKEN_STORE_PATH else None)
@@ -1,11 +1,60 @@
 import os
+import glob
+import tempfile
 
 import uvicorn
 
 APP_PORT = os.getenv("APP_PORT_ANALYZER", "8084")
 
+# "production" runs several workers without file watching, anything else is the reloading dev server
+SERVER_MODE = os.getenv("SERVER_MODE", "development")
+APP_HOST = os.getenv("APP_HOST", "0.0.0.0" if SERVER_MODE == "production" else "localhost")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))
+# Longer than the idle timeout of the load balancer in front, so it closes connections first
+SERVER_KEEP_ALIVE = int(os.getenv("SERVER_KEEP_ALIVE", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0"))
+
+
 def run_server():
-    uvicorn.run("app.main:app", host="localhost", port=int(APP_PORT), reload=True, reload_dirs=['app'])
+    uvicorn.run("app.main:app", host=APP_HOST, port=int(APP_PORT), reload=True, reload_dirs=['app'])
+
+
+def prepare_shared_state():
+    # Workers inherit the environment, so caches, token and metrics end up in the same files
+    os.environ.setdefault("SHARED_STATE_PATH", os.path.join(os.getcwd(), "hotels_api_state.sqlite3"))
+
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        # Samples of a previous run would be aggregated with the new ones. Only the
+        # prometheus_client files are removed, the directory may hold anything else
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="hotels_api_metrics_")
+
+
+def run_production_server():
+    prepare_shared_state()
+    # "auto" picks uvloop and httptools when installed (uvicorn[standard])
+    uvicorn.run(
+        "app.main:app",
+        host=APP_HOST,
+        port=int(APP_PORT),
+        workers=SERVER_WORKERS,
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=SERVER_KEEP_ALIVE,
+        backlog=SERVER_BACKLOG,
+        limit_concurrency=SERVER_LIMIT_CONCURRENCY or None,
+        proxy_headers=True,
+        access_log=False
+    )
+
 
 if __name__ == "__main__":
-    run_server()
+    if SERVER_MODE == "production":
+        run_production_server()
+    else:
+        run_server()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.config reads the environment at import time. Upstreams are mocked, so the URLs only need to be set
+os.environ.setdefault("TOKEN_URL", "http://upstream.test/v1/security/oauth2/token")
+os.environ.setdefault("BASE_URL", "http://upstream.test/v1/reference-data/locations")
+os.environ.setdefault("REVIEW_URL", "http://upstream.test/v2")
+os.environ["SHARED_STATE_PATH"] = ""
+os.environ["RETRY_ATTEMPTS"] = "0"
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    from app.controller import locationController
+    from app.services import resilience
+    from app.services.tokenManager import token_manager
+
+    resilience.breakers.clear()
+    locationController.iata_cache.clear()
+    locationController.hotels_cache.clear()
+    token_manager.invalidate()
+    yield
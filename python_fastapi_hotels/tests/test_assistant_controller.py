@@ -0,0 +1,42 @@
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controller import assistantController
+
+
+class FakeAssistant:
+    http_client = None
+
+    @classmethod
+    async def use_http_client(cls, client):
+        cls.http_client = client
+
+    @staticmethod
+    async def stream_accomodation_search(query, reviews_json_path):
+        yield "status", {"stage": "extraction"}
+        raise RuntimeError("ranking model unavailable")
+
+
+def search(monkeypatch):
+    monkeypatch.setattr(assistantController, "get_assistant", lambda: FakeAssistant)
+    app = FastAPI()
+    app.state.http_client = httpx.AsyncClient()
+    app.include_router(assistantController.router)
+    response = TestClient(app).get("/assistant/search/stream", params={"query": "hotel in Ooty"})
+    return app, response
+
+
+def test_pipeline_failures_are_logged_and_sent_as_an_error_event(monkeypatch, caplog):
+    _, response = search(monkeypatch)
+
+    assert response.status_code == 200
+    assert response.text.endswith('event: error\ndata: {"detail": "Internal Server Error"}\n\n')
+    assert "Assistant search failed" in caplog.text
+    assert "ranking model unavailable" in caplog.text
+
+
+def test_the_assistant_uses_the_app_http_client(monkeypatch):
+    app, _ = search(monkeypatch)
+
+    assert FakeAssistant.http_client is app.state.http_client
@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.controller import locationController
+from app.controller.locationController import get_hotels_cached, get_iata_code
+from app.services import background
+from app.services.resilience import UpstreamUnavailable
+
+
+def upstream_down(request):
+    return httpx.Response(503)
+
+
+def run_with_client(handler, call):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await call(client)
+    return asyncio.run(run())
+
+
+def test_expired_iata_code_is_served_when_the_upstream_fails():
+    locationController.iata_cache.set("bengaluru", "BLR", ttl=-1, stale_ttl=3600)
+
+    assert run_with_client(upstream_down, lambda client: get_iata_code(client, "Bengaluru")) == "BLR"
+
+
+def test_missing_iata_code_fails_when_the_upstream_fails():
+    with pytest.raises(UpstreamUnavailable):
+        run_with_client(upstream_down, lambda client: get_iata_code(client, "Bengaluru"))
+
+
+def test_fresh_iata_code_needs_no_token():
+    locationController.iata_cache.set("bengaluru", "BLR", ttl=3600)
+
+    def unexpected(request):
+        raise AssertionError(f"Unexpected upstream call to {request.url}")
+
+    assert run_with_client(unexpected, lambda client: get_iata_code(client, "Bengaluru")) == "BLR"
+
+
+def test_expired_hotels_are_served_when_the_token_endpoint_fails():
+    cache_key = locationController.make_key("BLR", [], [])
+    stale = locationController.hotels_cache.set(cache_key, {"hotels": [{"hotelId": "H1"}], "etag": '"1"'},
+                                                ttl=-7200, stale_ttl=24 * 3600)
+
+    entry = run_with_client(upstream_down, lambda client: get_hotels_cached(client, "BLR", [], []))
+
+    assert entry.value == stale.value
+
+
+def test_failed_background_revalidation_is_logged_and_keeps_the_stale_entry(caplog):
+    cache_key = locationController.make_key("BLR", [], [])
+    stale = locationController.hotels_cache.set(cache_key, {"hotels": [{"hotelId": "H1"}], "etag": '"1"'},
+                                                ttl=-1, stale_ttl=3600)
+
+    async def call(client):
+        entry = await get_hotels_cached(client, "BLR", [], [])
+        # The task is held by the background module, not dropped after the request returns
+        pending = [task for task in background._tasks if task.get_name() == "revalidate-hotels-BLR"]
+        assert len(pending) == 1
+        await asyncio.gather(*pending, return_exceptions=True)
+        return entry
+
+    entry = run_with_client(upstream_down, call)
+
+    assert entry.value == stale.value
+    assert locationController.hotels_cache.get(cache_key).value == stale.value
+    assert cache_key not in locationController._revalidating
+    assert not background._tasks
+    assert "Background task revalidate-hotels-BLR failed" in caplog.text
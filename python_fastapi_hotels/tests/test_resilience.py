@@ -0,0 +1,68 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+from app.services import resilience
+from app.services.resilience import UpstreamUnavailable, get_breaker, upstream_get
+
+URL = "http://upstream.test/v1/reference-data/locations"
+
+
+def test_breaker_is_shared_per_host():
+    assert get_breaker(URL) is get_breaker("http://upstream.test/v2/e-reputation/hotel-sentiments")
+    assert get_breaker(URL) is not get_breaker("http://other.test/")
+
+
+def test_cancelled_hedged_trial_releases_breaker_and_its_requests():
+    breaker = get_breaker(URL)
+    breaker.opened_at = 0.0
+    assert breaker.state == "half-open"
+    in_flight = []
+
+    async def hang(request):
+        in_flight.append(request)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            in_flight.remove(request)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(hang)) as client:
+            task = asyncio.create_task(upstream_get(client, URL, hedge_after=0.01))
+            await asyncio.sleep(0.05)
+            assert len(in_flight) == 2
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert in_flight == []
+    assert breaker.allow()
+
+
+def test_open_breaker_short_circuits():
+    for _ in range(resilience.config.BREAKER_FAILURE_THRESHOLD):
+        get_breaker(URL).record_failure()
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200))) as client:
+            await upstream_get(client, URL)
+
+    with pytest.raises(UpstreamUnavailable) as raised:
+        asyncio.run(run())
+    assert raised.value.status_code == 503
+
+
+def test_api_imports_without_the_assistant(tmp_path):
+    # Run from elsewhere with no assistant folder, so nothing of the assistant can be found
+    code = "import sys, app.main; print(sorted({'assistant', 'resilience', 'tracing'} & set(sys.modules)))"
+    env = {**os.environ, "ASSISTANT_DIR": str(tmp_path / "missing"), "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
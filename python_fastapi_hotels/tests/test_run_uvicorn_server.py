@@ -0,0 +1,12 @@
+import runUvicornServer
+
+
+def test_only_metric_files_are_cleared_from_the_multiprocess_dir(tmp_path, monkeypatch):
+    (tmp_path / "counter_1234.db").write_text("")
+    (tmp_path / "notes.txt").write_text("keep me")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setenv("SHARED_STATE_PATH", "")
+
+    runUvicornServer.prepare_shared_state()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["notes.txt"]
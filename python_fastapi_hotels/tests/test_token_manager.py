@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+
+from app import config
+from app.controller.locationController import call_with_token, fetch_city_locations
+from app.services.tokenManager import TokenManager, token_manager
+
+
+class TokenEndpoint:
+    """Mock upstream issuing token-1, token-2, ... and serving locations to `accepted` tokens."""
+
+    def __init__(self, expires_in=1799, accepted=None):
+        self.expires_in = expires_in
+        self.accepted = accepted
+        self.issued = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if str(request.url) == config.TOKEN_URL:
+            self.issued += 1
+            return httpx.Response(200, json={"access_token": f"token-{self.issued}", "expires_in": self.expires_in})
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        if self.accepted is not None and token not in self.accepted:
+            return httpx.Response(401)
+        return httpx.Response(200, json={"data": [{"iataCode": "BLR"}]})
+
+
+def run_with_client(upstream, call):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as client:
+            return await call(client)
+    return asyncio.run(run())
+
+
+def test_short_lived_token_is_reused():
+    upstream = TokenEndpoint(expires_in=30)
+    manager = TokenManager(refresh_margin=60)
+
+    async def twice(client):
+        return [await manager.get_token(client), await manager.get_token(client)]
+
+    assert run_with_client(upstream, twice) == ["token-1", "token-1"]
+    assert upstream.issued == 1
+
+
+def test_token_is_refreshed_ahead_of_expiry():
+    upstream = TokenEndpoint(expires_in=1799)
+    manager = TokenManager(refresh_margin=60)
+
+    async def expire_and_get(client):
+        await manager.get_token(client)
+        manager._refresh_at = manager._expires_at = 0.0
+        return await manager.get_token(client)
+
+    assert run_with_client(upstream, expire_and_get) == "token-2"
+
+
+def test_revoked_token_is_replaced_and_the_call_retried_once():
+    upstream = TokenEndpoint(accepted={"token-2"})
+
+    async def locations(client):
+        return await call_with_token(("locations", "bengaluru"), fetch_city_locations, client, "Bengaluru")
+
+    assert run_with_client(upstream, locations) == [{"iataCode": "BLR"}]
+    assert upstream.issued == 2
+
+
+def test_invalidating_an_old_token_keeps_the_newer_one():
+    upstream = TokenEndpoint()
+
+    async def run(client):
+        old = await token_manager.get_token(client)
+        token_manager.invalidate(old)
+        new = await token_manager.get_token(client)
+        token_manager.invalidate(old)
+        return new, await token_manager.get_token(client)
+
+    assert run_with_client(upstream, run) == ("token-2", "token-2")